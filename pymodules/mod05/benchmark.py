@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Code Nexus - throughput benchmark suite for the mod05 processors.
+
+Every (target, size) case runs in a fresh spawned process so the reported
+peak RSS belongs to that case alone. Results are written as JSON, keyed by
+the current git commit, so two runs can be diffed with --baseline.
+
+Usage:
+    python3 benchmark.py                         # 1e2 .. 1e7, all targets
+    python3 benchmark.py --sizes 100 10000 -t SensorStream.process_batch
+    python3 benchmark.py --baseline bench-abc1234.json
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_SIZES = [10**k for k in range(2, 8)]
+# total items processed per case; bounds the number of calls on big sizes
+ITEM_BUDGET = 10**7
+MIN_CALLS = 5
+
+
+def load_module(rel_path: str, module_name: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(
+        module_name, HERE / rel_path
+    )
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {rel_path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# =========================
+# Targets
+# =========================
+# Each builder takes the input size and returns a zero-argument callable
+# that processes `size` items once.
+
+Builder = Callable[[int], Callable[[], Any]]
+
+
+def numeric_process(n: int) -> Callable[[], Any]:
+    sp = load_module("ex0/stream_processor.py", "stream_processor")
+    proc, data = sp.NumericProcessor(), list(range(n))
+    return lambda: proc.process(data)
+
+
+def text_process(n: int) -> Callable[[], Any]:
+    sp = load_module("ex0/stream_processor.py", "stream_processor")
+    proc, data = sp.TextProcessor(), "nexus " * n
+    return lambda: proc.process(data)
+
+
+def log_lines(n: int) -> List[str]:
+    # mixed case and stray spaces exercise the level normalisation
+    levels = ("INFO", "WARNING", "ERROR", "debug ", " Info")
+    return [f"{levels[i % 5]}: event {i}" for i in range(n)]
+
+
+def log_process(n: int) -> Callable[[], Any]:
+    sp = load_module("ex0/stream_processor.py", "stream_processor")
+    proc, lines = sp.LogProcessor(), log_lines(n)
+    return lambda: [proc.process(line) for line in lines]
+
+
+def log_process_many(n: int) -> Callable[[], Any]:
+    sp = load_module("ex0/stream_processor.py", "stream_processor")
+    proc, lines = sp.LogProcessor(), log_lines(n)
+    return lambda: proc.process_many(lines, alert_samples=10)
+
+
+PROCESSOR_PAYLOADS: Dict[str, Callable[[int], Any]] = {
+    "NumericProcessor": lambda n: list(range(n)),
+    "TextProcessor": lambda n: "lorem ipsum " * n,
+    "LogProcessor": lambda n: "ERROR: " + "x" * n,
+}
+
+
+def legacy_format_output(proc: Any, data: Any) -> str:
+    # format_output before the per-call validation cache: process()
+    # validates internally, then validate() runs again
+    sp = sys.modules["stream_processor"]
+    result = proc.process(data)
+    validation = "verified" if proc.validate(data) else "Invalid data"
+    return (
+        f"\nInitializing {proc.name}...\n"
+        f"Processing data: {sp.pretty_data(data)}\n"
+        f"Validation: {validation}\n"
+        f"Output: {result}"
+    )
+
+
+def format_output(kind: str, *, legacy: bool = False) -> Builder:
+    """format_output over a payload of `n` items (chars for str data)."""
+    def build(n: int) -> Callable[[], Any]:
+        sp = load_module("ex0/stream_processor.py", "stream_processor")
+        proc, data = getattr(sp, kind)(), PROCESSOR_PAYLOADS[kind](n)
+        if legacy:
+            return lambda: legacy_format_output(proc, data)
+        return lambda: proc.format_output(data)
+    return build
+
+
+def sensor_items(n: int) -> List[str]:
+    keys = ("temp", "humidity", "pressure")
+    return [f"{keys[i % 3]}:{20 + i % 50}.5" for i in range(n)]
+
+
+def transaction_items(n: int) -> List[str]:
+    return [f"{'buy' if i % 2 else 'sell'}:{i % 1000}" for i in range(n)]
+
+
+def event_items(n: int) -> List[str]:
+    events = ("login", "error", "logout")
+    return [events[i % 3] for i in range(n)]
+
+
+STREAM_ITEMS = {
+    "SensorStream": sensor_items,
+    "TransactionStream": transaction_items,
+    "EventStream": event_items,
+}
+
+
+def stream_batch(kind: str, *, raw: bool = False) -> Builder:
+    """
+    process_batch over `n` items; raw=True feeds the same items as one
+    newline-delimited bytes buffer (RawBatch) instead of a list of str.
+    """
+    def build(n: int) -> Callable[[], Any]:
+        ds = load_module("ex1/data_stream.py", "data_stream")
+        stream, data = getattr(ds, kind)(), STREAM_ITEMS[kind](n)
+        if raw:
+            buffer = "\n".join(data).encode()
+            return lambda: stream.process_batch(ds.RawBatch(buffer))
+        return lambda: stream.process_batch(data)
+    return build
+
+
+def legacy_sensor_values(data_batch: List[Any]) -> List[float]:
+    # SensorStream's parsing loop before parse_readings(), for reference
+    values: List[float] = []
+    for item in data_batch:
+        parts = str(item).strip().split(":")
+        if len(parts) < 2:
+            continue
+        try:
+            values.append(float(parts[-1]))
+        except ValueError:
+            continue
+    return values
+
+
+def sensor_parse(*, legacy: bool = False) -> Builder:
+    def build(n: int) -> Callable[[], Any]:
+        data = sensor_items(n)
+        if legacy:
+            return lambda: legacy_sensor_values(data)
+        ds = load_module("ex1/data_stream.py", "data_stream")
+        stream = ds.SensorStream()
+        return lambda: stream.parse_readings(data)
+    return build
+
+
+def pipeline_run(n: int) -> Callable[[], Any]:
+    nx = load_module("ex2/nexus_pipeline.py", "nexus_pipeline")
+    adapters = (nx.JSONAdapter(), nx.CSVAdapter(), nx.StreamAdapter())
+    records = [f"record {i}" for i in range(n)]
+    return lambda: [adapters[i % 3].run(r) for i, r in enumerate(records)]
+
+
+TARGETS: Dict[str, Builder] = {
+    "NumericProcessor.process": numeric_process,
+    "TextProcessor.process": text_process,
+    "LogProcessor.process": log_process,
+    "LogProcessor.process_many": log_process_many,
+    **{
+        f"{kind}.format_output{suffix}": format_output(kind, legacy=legacy)
+        for kind in PROCESSOR_PAYLOADS
+        for suffix, legacy in (("", False), ("[legacy]", True))
+    },
+    **{
+        f"{kind}.process_batch{suffix}": stream_batch(kind, raw=raw)
+        for kind in STREAM_ITEMS
+        for suffix, raw in (("", False), ("[raw]", True))
+    },
+    "SensorStream.parse_readings": sensor_parse(),
+    "SensorStream.parse_readings[legacy]": sensor_parse(legacy=True),
+    "ProcessingPipeline.run": pipeline_run,
+}
+
+
+# =========================
+# Measurement
+# =========================
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    idx = round(pct / 100 * (len(sorted_samples) - 1))
+    return sorted_samples[idx]
+
+
+def run_case(target: str, size: int, max_calls: int) -> Dict[str, Any]:
+    """Executed in a fresh child process."""
+    call = TARGETS[target](size)
+    calls = max(MIN_CALLS, min(max_calls, ITEM_BUDGET // size))
+
+    call()  # warm-up
+    samples: List[float] = []
+    for _ in range(calls):
+        start = time.perf_counter_ns()
+        call()
+        samples.append((time.perf_counter_ns() - start) / 1e9)
+    samples.sort()
+
+    p50 = percentile(samples, 50)
+    return {
+        "target": target,
+        "size": size,
+        "calls": calls,
+        "ops_per_sec": size / p50 if p50 else float("inf"),
+        "p50_ms": p50 * 1e3,
+        "p99_ms": percentile(samples, 99) * 1e3,
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return out.stdout.strip()
+
+
+def run_suite(
+    targets: List[str], sizes: List[int], max_calls: int
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    ctx = multiprocessing.get_context("spawn")
+    for target in targets:
+        for size in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                row = pool.submit(run_case, target, size, max_calls).result()
+            results.append(row)
+            print(
+                f"{target:<36} n={size:<9} "
+                f"{row['ops_per_sec']:>14,.0f} ops/s  "
+                f"p50 {row['p50_ms']:>10.3f} ms  "
+                f"p99 {row['p99_ms']:>10.3f} ms  "
+                f"rss {row['peak_rss_kb'] / 1024:>8.1f} MiB"
+            )
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline_path: Path
+) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    old: Dict[Tuple[str, int], float] = {
+        (r["target"], r["size"]): r["ops_per_sec"]
+        for r in baseline["results"]
+    }
+    print(f"\n=== Compared with {baseline.get('commit', baseline_path)} ===")
+    for r in results:
+        before = old.get((r["target"], r["size"]))
+        if not before:
+            continue
+        change = (r["ops_per_sec"] / before - 1) * 100
+        print(f"{r['target']:<36} n={r['size']:<9} {change:+7.1f}% ops/s")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the mod05 processors and streams."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help="Input sizes (items per call). Default: 1e2 .. 1e7.",
+    )
+    parser.add_argument(
+        "-t", "--target", action="append", choices=tuple(TARGETS),
+        help="Benchmark only this target (repeatable). Default: all.",
+    )
+    parser.add_argument(
+        "--calls", type=int, default=100,
+        help="Maximum timed calls per case (fewer on large sizes).",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path,
+        help="JSON result file. Default: bench-<commit>.json",
+    )
+    parser.add_argument(
+        "--baseline", type=Path,
+        help="Previous JSON result to report ops/sec changes against.",
+    )
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    print("=== CODE NEXUS - BENCHMARK SUITE ===")
+    print(f"Commit: {commit}, Python {platform.python_version()}\n")
+
+    results = run_suite(args.target or list(TARGETS), args.sizes,
+                        args.calls)
+
+    output = args.output or Path(f"bench-{commit}.json")
+    output.write_text(json.dumps({
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,115 @@
 #!/usr/bin/env python3
 
+import asyncio
+import codecs
+import inspect
+import itertools
+import math
+import os
+import sys
 from abc import ABC, abstractmethod
-from typing import Any
+from array import array
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextvars import ContextVar
+from typing import Any, NamedTuple, Optional, Union
 
+try:
+    import numpy as np
+except ImportError:  # pure-Python fallback below
+    np = None
 
-def pretty_data(data: Any) -> str:
+
+PREVIEW_ITEMS = 10
+PREVIEW_CHARS = 200
+PREVIEW_DEPTH = 4
+
+
+def _clip(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else f"{text[:max_chars]}..."
+
+
+def _preview(data: Any, max_items: int, max_chars: int, depth: int) -> str:
+    if isinstance(data, str):
+        # slice before repr so a huge string is never escaped in full
+        if len(data) <= max_chars:
+            return repr(data)
+        return f"{data[:max_chars]!r}..."
+
+    if isinstance(data, dict):
+        opening, closing = "{", "}"
+        items: Iterable[Any] = data.items()
+    elif isinstance(data, (list, tuple)):
+        opening, closing = ("[", "]") if isinstance(data, list) else "()"
+        items = data
+    else:
+        return _clip(repr(data), max_chars)
+
+    if depth >= PREVIEW_DEPTH:
+        return f"{opening}...{closing}"
+
+    parts = _preview_parts(
+        items, max_items, max_chars, depth + 1,
+        pairs=isinstance(data, dict),
+    )
+    hidden = len(data) - len(parts)
+    if hidden:
+        parts.append(f"... (+{hidden} more)")
+    elif isinstance(data, tuple) and len(data) == 1:
+        return f"({parts[0]},)"
+    return f"{opening}{', '.join(parts)}{closing}"
+
+
+def _preview_parts(
+    items: Iterable[Any], max_items: int, max_chars: int, depth: int,
+    *, pairs: bool,
+) -> list[str]:
+    """Previews of the leading items, stopping once max_chars is used."""
+    parts: list[str] = []
+    used = 0
+    for item in itertools.islice(items, max_items):
+        budget = max(max_chars - used, 0)
+        if pairs:
+            key, value = item
+            piece = (
+                f"{_preview(key, max_items, budget, depth)}: "
+                f"{_preview(value, max_items, budget, depth)}"
+            )
+        else:
+            piece = _preview(item, max_items, budget, depth)
+        parts.append(piece)
+        used += len(piece) + 2
+        if used >= max_chars:
+            break
+    return parts
+
+
+def pretty_data(
+    data: Any,
+    max_items: int = PREVIEW_ITEMS,
+    max_chars: int = PREVIEW_CHARS,
+) -> str:
+    """
+    Bounded preview of a payload: strings, lists, tuples and dicts are
+    cut to max_items elements / roughly max_chars characters without
+    building the repr of the whole object.
+    """
     if isinstance(data, str):
-        return f"\"{data}\""
-    return str(data)
+        return f"\"{_clip(data, max_chars)}\""
+    if isinstance(data, (list, tuple, dict)):
+        return _preview(data, max_items, max_chars, 0)
+    return _clip(str(data), max_chars)
+
+
+# (processor, payload, verdict) of the format_output call in progress;
+# a ContextVar keeps it private to the current thread / task
+_validated: ContextVar[Optional[tuple[Any, Any, bool]]] = ContextVar(
+    "_validated", default=None
+)
 
 
 class DataProcessor(ABC):
@@ -21,12 +123,28 @@ class DataProcessor(ABC):
     def validate(self, data: Any) -> bool:
         raise NotImplementedError
 
+    def _is_valid(self, data: Any) -> bool:
+        """
+        validate(), reusing the verdict format_output already computed for
+        this exact payload instead of running the check again.
+        """
+        cached = _validated.get()
+        if cached is not None and cached[0] is self and cached[1] is data:
+            return cached[2]
+        return self.validate(data)
+
     # STANDARD OUTPUT
     def format_output(self, data: Any) -> str:
-        result = self.process(data)
+        valid = self.validate(data)
+        token = _validated.set((self, data, valid))
+        try:
+            result = self.process(data)
+        finally:
+            _validated.reset(token)
+
         validation = (
             f"{self.name.split()[0]} data verified"
-            if self.validate(data)
+            if valid
             else "Invalid data"
         )
 
@@ -42,14 +160,143 @@ class DataProcessor(ABC):
         return f"{prefix}: {self.process(data)}"
 
 
+class NumericSummary(NamedTuple):
+    count: int
+    total: float
+    mean: float
+    minimum: float
+    maximum: float
+    variance: float
+
+
+def _flat_buffer(data: Any) -> Any:
+    # array.array and memoryview are read in place, never copied to a list
+    if isinstance(data, array):
+        return memoryview(data)
+    if isinstance(data, memoryview) and data.ndim > 1:
+        return data.cast("B").cast(data.format)
+    return data
+
+
+def summarize_numeric(data: Any) -> NumericSummary:
+    """
+    Summarize a list, array.array, memoryview, NumPy array or any other
+    iterable of numbers. Raises ValueError on an empty batch.
+    """
+    # NumPy only takes buffers, where it gives the same answer as the loop
+    # below; other iterables would turn into 0-d object arrays
+    if np is not None and isinstance(data, (np.ndarray, array, memoryview)):
+        values = np.asarray(data).ravel()
+        if values.size == 0:
+            raise ValueError("Empty batch.")
+        # integer sums wrap in NumPy; Python ints do not
+        total = (
+            sum(values.tolist()) if values.dtype.kind in "iub"
+            else values.sum().item()
+        )
+        return NumericSummary(
+            count=int(values.size),
+            total=total,
+            mean=float(values.mean()),
+            minimum=values.min().item(),
+            maximum=values.max().item(),
+            variance=float(values.var()),
+        )
+
+    it = iter(_flat_buffer(data))
+    try:
+        first = next(it)
+    except StopIteration:
+        raise ValueError("Empty batch.") from None
+
+    # Welford: one pass, no intermediate copies
+    count = 1
+    total = first
+    mean = float(first)
+    m2 = 0.0
+    lo = hi = first
+    for x in it:
+        count += 1
+        total += x
+        delta = x - mean
+        mean += delta / count
+        m2 += delta * (x - mean)
+        if x < lo:
+            lo = x
+        elif x > hi:
+            hi = x
+
+    return NumericSummary(count, total, mean, lo, hi, m2 / count)
+
+
+class NumericAccumulator:
+    """
+    Running count/total/mean/variance/min/max over consecutive batches.
+    update() costs O(batch); merge() folds in another accumulator (e.g. a
+    worker's partial result) with Chan's parallel variance formula.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total: float = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum: float = math.inf
+        self.maximum: float = -math.inf
+
+    def _combine(
+        self, count: int, total: float, mean: float, m2: float,
+        minimum: float, maximum: float,
+    ) -> None:
+        if count == 0:
+            return
+        n = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / n
+        self.m2 += m2 + delta * delta * self.count * count / n
+        self.count = n
+        self.total += total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def update(self, batch: Any) -> "NumericAccumulator":
+        try:
+            s = summarize_numeric(batch)
+        except ValueError:
+            return self
+        self._combine(
+            s.count, s.total, s.mean, s.variance * s.count,
+            s.minimum, s.maximum,
+        )
+        return self
+
+    def merge(self, other: "NumericAccumulator") -> "NumericAccumulator":
+        self._combine(
+            other.count, other.total, other.mean, other.m2,
+            other.minimum, other.maximum,
+        )
+        return self
+
+    def summary(self) -> NumericSummary:
+        if self.count == 0:
+            raise ValueError("Empty accumulator.")
+        return NumericSummary(
+            self.count, self.total, self.mean,
+            self.minimum, self.maximum, self.m2 / self.count,
+        )
+
+
 class NumericProcessor(DataProcessor):
     name = "Numeric Processor"
 
+    def process_batch(self, data: Any) -> NumericSummary:
+        return summarize_numeric(data)
+
     def validate(self, data: Any) -> bool:
         return isinstance(data, list)
 
     def process(self, data: Any) -> str:
-        if not self.validate(data):
+        if not self._is_valid(data):
             return "Invalid numeric data."
 
         try:
@@ -65,14 +312,67 @@ class NumericProcessor(DataProcessor):
         return f"Processed {len(data)} numeric values, sum={total}, avg={avg}"
 
 
+class TextSummary(NamedTuple):
+    characters: int
+    words: int
+    lines: int
+
+
+TextSource = Union[str, os.PathLike[str], Iterable[bytes]]
+
+
+def _iter_chunks(source: TextSource, chunk_size: int) -> Iterator[bytes]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    else:
+        yield from source
+
+
 class TextProcessor(DataProcessor):
     name = "Text Processor"
 
+    def process_stream(
+        self, source: TextSource, chunk_size: int = 1 << 16,
+        encoding: str = "utf-8",
+    ) -> TextSummary:
+        """
+        Count characters, words and lines of a file path or an iterable of
+        bytes chunks, holding at most one chunk in memory. A trailing line
+        without a newline still counts as a line.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        chars = words = newlines = 0
+        in_word = False
+        last = ""
+
+        def feed(text: str) -> None:
+            nonlocal chars, words, newlines, in_word, last
+            if not text:
+                return
+            chars += len(text)
+            newlines += text.count("\n")
+            n = len(text.split())
+            # a word cut by the previous chunk boundary was already counted
+            if n and in_word and not text[0].isspace():
+                n -= 1
+            words += n
+            in_word = not text[-1].isspace()
+            last = text[-1]
+
+        for chunk in _iter_chunks(source, chunk_size):
+            feed(decoder.decode(chunk))
+        feed(decoder.decode(b"", final=True))
+
+        lines = newlines + (1 if last and last != "\n" else 0)
+        return TextSummary(chars, words, lines)
+
     def validate(self, data: Any) -> bool:
         return isinstance(data, str)
 
     def process(self, data: Any) -> str:
-        if not self.validate(data):
+        if not self._is_valid(data):
             return "Invalid text data."
 
         try:
@@ -85,14 +385,54 @@ class TextProcessor(DataProcessor):
         return f"Processed text: {chars} characters, {words} words"
 
 
+class LogSummary(NamedTuple):
+    total: int
+    invalid: int
+    counts: dict[str, int]
+    alerts: list[str]
+
+
 class LogProcessor(DataProcessor):
     name = "Log Processor"
+    LEVEL_CACHE_SIZE = 1024
+
+    def process_many(
+        self, lines: Iterable[str], alert_samples: int = 0
+    ) -> LogSummary:
+        """
+        Parse an iterable of "LEVEL: message" lines in one loop. Each raw
+        level token is normalized once and interned; ERROR messages are
+        kept as ALERT samples, up to alert_samples of them.
+        """
+        levels: dict[str, str] = {}
+        counts: dict[str, int] = {}
+        alerts: list[str] = []
+        total = invalid = 0
+
+        for line in lines:
+            total += 1
+            raw, sep, msg = line.partition(":")
+            if not sep:
+                invalid += 1
+                continue
+
+            level = levels.get(raw)
+            if level is None:
+                level = sys.intern(raw.strip().upper())
+                if len(levels) < self.LEVEL_CACHE_SIZE:
+                    levels[raw] = level
+
+            counts[level] = counts.get(level, 0) + 1
+            if level == "ERROR" and len(alerts) < alert_samples:
+                alerts.append(msg.strip())
+
+        return LogSummary(total, invalid, counts, alerts)
 
     def validate(self, data: Any) -> bool:
         return isinstance(data, str) and ":" in data
 
     def process(self, data: Any) -> str:
-        if not self.validate(data):
+        if not self._is_valid(data):
             return "Invalid log entry."
 
         try:
@@ -113,23 +453,268 @@ class LogProcessor(DataProcessor):
 # Execution helpers
 # =========================
 
-def run_standard(processors: DataProcessor, samples: list[Any]) -> str:
+EXECUTORS: dict[str, type[Executor]] = {
+    "thread": ThreadPoolExecutor,
+    "process": ProcessPoolExecutor,
+}
+
+
+def _format_output(p: DataProcessor, s: Any) -> str:
+    return p.format_output(s)
+
+
+def _format_result(p: DataProcessor, s: Any, prefix: str) -> str:
+    return p.format_result(s, prefix)
+
+
+def _map_pairs(
+    fn: Callable[..., str],
+    args: tuple[Iterable[Any], ...],
+    executor: Optional[str],
+    max_workers: Optional[int],
+    chunksize: int,
+) -> list[str]:
+    """
+    Apply fn over args, in order, either inline or on a thread/process
+    pool. chunksize batches pairs per IPC round trip (process pool only).
+    """
+    if executor is None:
+        return list(map(fn, *args))
+
+    pool_cls = EXECUTORS.get(executor)
+    if pool_cls is None:
+        raise ValueError(
+            f"Unknown executor {executor!r} "
+            f"(expected one of: {', '.join(EXECUTORS)})"
+        )
+    with pool_cls(max_workers=max_workers) as pool:
+        return list(pool.map(fn, *args, chunksize=chunksize))
+
+
+def run_standard(
+    processors: DataProcessor,
+    samples: list[Any],
+    executor: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+) -> str:
     return "\n".join(
-        p.format_output(s)
-        for p, s in zip(processors, samples, strict=False)
+        _map_pairs(
+            _format_output, (processors, samples),
+            executor, max_workers, chunksize,
+        )
     )
 
 
-def run_polymorphic(processors: DataProcessor, samples: list[Any]) -> str:
+def run_polymorphic(
+    processors: DataProcessor,
+    samples: list[Any],
+    executor: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+) -> str:
     lines = ["Processing multiple data types through same interface..."]
+    prefixes = (f"Result {i}" for i in itertools.count(1))
     lines.extend(
-        p.format_result(s, f"Result {i}")
-        for i, (p, s) in enumerate(zip(processors, samples,
-                                       strict=False), start=1)
+        _map_pairs(
+            _format_result, (processors, samples, prefixes),
+            executor, max_workers, chunksize,
+        )
     )
     return "\n".join(lines)
 
 
+# =========================
+# Type-based dispatch
+# =========================
+
+_UNROUTED = object()
+
+
+class ProcessorRegistry:
+    """
+    Routes samples to processors through a table keyed by the exact type
+    of each sample; subclasses are resolved once through their MRO and
+    cached. Strings containing ":" go to the log processor when one is
+    registered.
+    """
+
+    def __init__(self) -> None:
+        self._table: dict[type, Any] = {}
+        self._registered: dict[type, DataProcessor] = {}
+        self._log: Optional[DataProcessor] = None
+
+    def register(self, data_type: type, processor: DataProcessor) -> None:
+        self._registered[data_type] = processor
+        self._table = dict(self._registered)
+
+    def register_log(self, processor: DataProcessor) -> None:
+        self._log = processor
+
+    def resolve(self, data: Any) -> Optional[DataProcessor]:
+        kind = type(data)
+        proc = self._table.get(kind, _UNROUTED)
+        if proc is _UNROUTED:
+            proc = next(
+                (self._registered[k] for k in kind.__mro__
+                 if k in self._registered),
+                None,
+            )
+            self._table[kind] = proc
+
+        if self._log is not None and isinstance(data, str) and ":" in data:
+            return self._log
+        return proc
+
+    def route(
+        self, samples: Iterable[Any]
+    ) -> tuple[list[DataProcessor], list[Any], int]:
+        """Split samples into parallel (processors, samples) lists."""
+        processors: list[DataProcessor] = []
+        routed: list[Any] = []
+        skipped = 0
+        for sample in samples:
+            proc = self.resolve(sample)
+            if proc is None:
+                skipped += 1
+                continue
+            processors.append(proc)
+            routed.append(sample)
+        return processors, routed, skipped
+
+    def run(
+        self,
+        samples: Iterable[Any],
+        executor: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        chunksize: int = 1,
+    ) -> str:
+        processors, routed, skipped = self.route(samples)
+        output = run_polymorphic(
+            processors, routed, executor, max_workers, chunksize
+        )
+        if skipped:
+            output += f"\nSkipped {skipped} sample(s) with no processor."
+        return output
+
+
+def default_registry() -> ProcessorRegistry:
+    registry = ProcessorRegistry()
+    registry.register(list, NumericProcessor())
+    registry.register(str, TextProcessor())
+    registry.register_log(LogProcessor())
+    return registry
+
+
+# =========================
+# Asyncio interface
+# =========================
+
+class AsyncDataProcessor(ABC):
+    name: str = "Generic Async Processor"
+
+    @abstractmethod
+    async def process(self, data: Any) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def validate(self, data: Any) -> bool:
+        raise NotImplementedError
+
+    # STANDARD OUTPUT
+    async def format_output(self, data: Any) -> str:
+        valid = await self.validate(data)
+        result = await self._process_validated(data, valid=valid)
+        validation = (
+            f"{self.name.split()[0]} data verified"
+            if valid
+            else "Invalid data"
+        )
+
+        return (
+            f"\nInitializing {self.name}...\n"
+            f"Processing data: {pretty_data(data)}\n"
+            f"Validation: {validation}\n"
+            f"Output: {result}"
+        )
+
+    async def _process_validated(
+        self, data: Any, *, valid: bool
+    ) -> str:
+        """process() for a payload format_output has already validated."""
+        return await self.process(data)
+
+    # POLYMORPHIC OUTPUT
+    async def format_result(self, data: Any, prefix: str) -> str:
+        return f"{prefix}: {await self.process(data)}"
+
+
+class AsyncProcessorAdapter(AsyncDataProcessor):
+    """
+    Async front for a synchronous DataProcessor. process() runs in a worker
+    thread so a large payload does not stall the event loop.
+    """
+
+    def __init__(self, processor: DataProcessor) -> None:
+        self.processor = processor
+        self.name = processor.name
+
+    async def validate(self, data: Any) -> bool:
+        return self.processor.validate(data)
+
+    async def process(self, data: Any) -> str:
+        return await asyncio.to_thread(self.processor.process, data)
+
+    async def _process_validated(
+        self, data: Any, *, valid: bool
+    ) -> str:
+        # to_thread copies the current context, so the wrapped processor's
+        # _is_valid sees the verdict, as in the sync format_output
+        token = _validated.set((self.processor, data, valid))
+        try:
+            return await self.process(data)
+        finally:
+            _validated.reset(token)
+
+
+async def run_polymorphic_async(
+    processors: Iterable[AsyncDataProcessor],
+    sources: Iterable[Any],
+    max_concurrency: int = 8,
+) -> str:
+    """
+    Async run_polymorphic. A source is either a payload or an awaitable
+    that yields one (e.g. a pending socket/file read). At most
+    max_concurrency sources are in flight; the next source is only pulled
+    once a slot frees up. Results keep input order.
+    """
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(p: AsyncDataProcessor, src: Any, prefix: str) -> str:
+        try:
+            data = await src if inspect.isawaitable(src) else src
+            return await p.format_result(data, prefix)
+        finally:
+            slots.release()
+
+    tasks: list[asyncio.Task[str]] = []
+    pairs = zip(processors, sources, strict=False)
+    async with asyncio.TaskGroup() as group:
+        for i in itertools.count(1):
+            # take the slot first: pulling a source may start its read
+            await slots.acquire()
+            try:
+                p, src = next(pairs)
+            except StopIteration:
+                slots.release()
+                break
+            tasks.append(group.create_task(run_one(p, src, f"Result {i}")))
+
+    lines = ["Processing multiple data types through same interface..."]
+    lines.extend(task.result() for task in tasks)
+    return "\n".join(lines)
+
+
 if __name__ == "__main__":
     processors = [NumericProcessor(), TextProcessor(), LogProcessor()]
 
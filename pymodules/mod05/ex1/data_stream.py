@@ -1,7 +1,423 @@
 #!/usr/bin/env python3
 
+import asyncio
+import bisect
+import contextlib
+import copy
+import hashlib
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import traceback
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from array import array
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from pathlib import Path
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+
+class ColumnarBatch:
+    """
+    A batch parsed once at ingestion. Each item "key:value" becomes a code
+    into `categories` (interned keys, stripped) plus a float in `values`;
+    `numeric` flags items whose text after the last ":" parsed as a number.
+    Items without a numeric tail keep their whole stripped text as key.
+    The source items are kept, uncopied, for filters that need them; any
+    other iterable (e.g. a RawBatch) is materialized into a list first.
+    """
+
+    def __init__(
+        self,
+        items: List[Any],
+        categories: List[str],
+        codes: array,
+        values: array,
+        numeric: bytearray,
+    ) -> None:
+        self.items = items
+        self.categories = categories
+        self.codes = codes
+        self.values = values
+        self.numeric = numeric
+        self.index: Optional[BatchIndex] = None
+        self.nbytes: Optional[int] = None
+
+    @staticmethod
+    def from_items(items: Iterable[Any]) -> "ColumnarBatch":
+        items = items if isinstance(items, list) else list(items)
+        index: Dict[str, int] = {}
+        categories: List[str] = []
+        codes = array("I")
+        values = array("d")
+        numeric = bytearray()
+
+        for item in items:
+            text = str(item).strip()
+            head, sep, tail = text.rpartition(":")
+            value = math.nan
+            is_number = 0
+            if sep:
+                try:
+                    value = float(tail)
+                    is_number = 1
+                except ValueError:
+                    head = text
+            else:
+                head = text
+
+            code = index.get(head)
+            if code is None:
+                code = index[head] = len(categories)
+                categories.append(sys.intern(head.strip()))
+            codes.append(code)
+            values.append(value)
+            numeric.append(is_number)
+
+        return ColumnarBatch(items, categories, codes, values, numeric)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def build_index(self) -> "BatchIndex":
+        """Index this batch so predicate filters skip the linear scan."""
+        if self.index is None:
+            self.index = BatchIndex(self)
+        return self.index
+
+    def take(self, positions: List[int]) -> "ColumnarBatch":
+        """Subset sharing this batch's categories; nothing is re-parsed."""
+        codes, values = self.codes, self.values
+        return ColumnarBatch(
+            [self.items[i] for i in positions],
+            self.categories,
+            array("I", [codes[i] for i in positions]),
+            array("d", [values[i] for i in positions]),
+            bytearray(self.numeric[i] for i in positions),
+        )
+
+    def group_values(
+        self, key_of: Callable[[str], Optional[str]]
+    ) -> Dict[str, List[float]]:
+        """
+        Numeric values grouped by key_of(category); key_of runs once per
+        category, and a None result drops that category.
+        """
+        keys = [key_of(category) for category in self.categories]
+        groups: Dict[str, List[float]] = {}
+        for code, value, is_number in zip(
+            self.codes, self.values, self.numeric, strict=True
+        ):
+            key = keys[code]
+            if is_number and key is not None:
+                groups.setdefault(key, []).append(value)
+        return groups
+
+
+class BatchIndex:
+    """
+    Per-batch lookup structures: key -> positions, keys sorted for prefix
+    search, and numeric positions sorted by value for range search.
+    """
+
+    def __init__(self, batch: ColumnarBatch) -> None:
+        self.size = len(batch)
+        by_code: List[List[int]] = [[] for _ in batch.categories]
+        for i, code in enumerate(batch.codes):
+            by_code[code].append(i)
+
+        self.positions: Dict[str, List[int]] = {}
+        for category, found in zip(batch.categories, by_code, strict=True):
+            if category in self.positions:  # keys equal once stripped
+                found = sorted(self.positions[category] + found)
+            self.positions[category] = found
+        self.keys = sorted(self.positions)
+
+        values = batch.values
+        order = sorted(
+            (i for i, is_number in enumerate(batch.numeric)
+             if is_number and not math.isnan(values[i])),
+            key=values.__getitem__,
+        )
+        self.order = array("I", order)
+        self.sorted_values = array("d", (values[i] for i in order))
+
+    def key_positions(self, key: str) -> List[int]:
+        return self.positions.get(key, [])
+
+    def prefix_positions(self, prefix: str) -> List[int]:
+        found: List[int] = []
+        start = bisect.bisect_left(self.keys, prefix)
+        for key in itertools.islice(self.keys, start, None):
+            if not key.startswith(prefix):
+                break
+            found.extend(self.positions[key])
+        return sorted(found)
+
+    def range_positions(
+        self, low: Optional[float], high: Optional[float]
+    ) -> List[int]:
+        lo = 0 if low is None else bisect.bisect_left(self.sorted_values, low)
+        hi = (
+            len(self.sorted_values) if high is None
+            else bisect.bisect_right(self.sorted_values, high)
+        )
+        return sorted(self.order[lo:hi])
+
+
+# =========================
+# Filter predicates
+# =========================
+
+class Predicate(ABC):
+    @abstractmethod
+    def matches(self, key: str, value: float, is_number: int) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def lookup(self, index: BatchIndex) -> List[int]:
+        raise NotImplementedError
+
+
+class KeyEquals(Predicate):
+    def __init__(self, key: str) -> None:
+        self.key = key
+
+    def matches(self, key: str, value: float, is_number: int) -> bool:
+        return key == self.key
+
+    def lookup(self, index: BatchIndex) -> List[int]:
+        return index.key_positions(self.key)
+
+
+class KeyPrefix(Predicate):
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+
+    def matches(self, key: str, value: float, is_number: int) -> bool:
+        return key.startswith(self.prefix)
+
+    def lookup(self, index: BatchIndex) -> List[int]:
+        return index.prefix_positions(self.prefix)
+
+
+class ValueRange(Predicate):
+    """Inclusive bounds; None leaves that side open; NaN never matches."""
+
+    def __init__(
+        self, low: Optional[float] = None, high: Optional[float] = None
+    ) -> None:
+        self.low = low
+        self.high = high
+
+    def matches(self, key: str, value: float, is_number: int) -> bool:
+        return bool(is_number) and not math.isnan(value) and (
+            (self.low is None or value >= self.low)
+            and (self.high is None or value <= self.high)
+        )
+
+    def lookup(self, index: BatchIndex) -> List[int]:
+        return index.range_positions(self.low, self.high)
+
+
+class AllOf(Predicate):
+    def __init__(self, *predicates: Predicate) -> None:
+        self.predicates = predicates
+
+    def matches(self, key: str, value: float, is_number: int) -> bool:
+        return all(p.matches(key, value, is_number) for p in self.predicates)
+
+    def lookup(self, index: BatchIndex) -> List[int]:
+        found = sorted(
+            (p.lookup(index) for p in self.predicates), key=len
+        )
+        if not found:
+            return list(range(index.size))
+        keep = set(found[0])
+        for positions in found[1:]:
+            keep.intersection_update(positions)
+        return sorted(keep)
+
+
+class RawBatch:
+    """
+    Delimited records straight from a bytes-like buffer (a socket or file
+    read). The streams parse numbers from the raw byte records and decode
+    only distinct keys, so a batch never pays a str() per item; iterating
+    yields decoded text for the generic paths (filter_data, from_items).
+    """
+
+    def __init__(
+        self, data: Union[bytes, bytearray, memoryview],
+        delimiter: bytes = b"\n",
+    ) -> None:
+        # bytes.split is the one C-level pass over the buffer; a bytearray
+        # or memoryview costs one contiguous copy here, not one per record
+        self.data = data if isinstance(data, bytes) else bytes(data)
+        self.delimiter = delimiter
+        self._records: Optional[List[bytes]] = None
+
+    @property
+    def records(self) -> List[bytes]:
+        if self._records is None:
+            records = self.data.split(self.delimiter)
+            if records and not records[-1]:
+                records.pop()  # trailing delimiter
+            self._records = records
+        return self._records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[str]:
+        for record in self.records:
+            yield record.decode(errors="replace")
+
+
+def raw_batches(
+    chunks: Iterable[Union[bytes, bytearray, memoryview]],
+    delimiter: bytes = b"\n",
+) -> Iterator[RawBatch]:
+    """
+    One RawBatch per chunk (e.g. each recv()); a record cut at a chunk
+    boundary is carried over and completed by the next chunk.
+    """
+    tail = b""
+    for chunk in chunks:
+        data = tail + chunk if tail else bytes(chunk)
+        cut = data.rfind(delimiter)
+        if cut < 0:
+            tail = data
+            continue
+        tail = data[cut + len(delimiter):]
+        yield RawBatch(data[:cut + len(delimiter)], delimiter)
+    if tail:
+        yield RawBatch(tail, delimiter)
+
+
+Batch = Union[List[Any], ColumnarBatch, RawBatch]
+
+# batch latency buckets: [2**(k-1), 2**k) microseconds, last one open
+LATENCY_BUCKETS = 32
+
+
+def _batch_bytes(data_batch: Batch) -> int:
+    """
+    Length of the items' text (equal to bytes for ASCII payloads); a
+    RawBatch counts its whole buffer, delimiters included.
+    """
+    if isinstance(data_batch, ColumnarBatch):
+        if data_batch.nbytes is None:
+            data_batch.nbytes = _batch_bytes(data_batch.items)
+        return data_batch.nbytes
+    if isinstance(data_batch, RawBatch):
+        return len(data_batch.data)
+    try:
+        return sum(map(len, data_batch))
+    except TypeError:  # non-text items have no byte length to count
+        return sum(
+            len(item) for item in data_batch
+            if isinstance(item, (str, bytes))
+        )
+
+
+Criteria = Union[str, Predicate, None]
+
+
+# =========================
+# Binary snapshots
+# =========================
+
+SNAPSHOT_MAGIC = b"NXS1"
+
+
+class SnapshotWriter:
+    """Little-endian struct/array encoding; no pickle involved."""
+
+    def __init__(self) -> None:
+        self.parts: List[bytes] = [SNAPSHOT_MAGIC]
+
+    def write_int(self, n: int) -> None:
+        self.parts.append(struct.pack("<q", n))
+
+    def write_float(self, x: float) -> None:
+        self.parts.append(struct.pack("<d", x))
+
+    def write_blob(self, data: bytes) -> None:
+        self.write_int(len(data))
+        self.parts.append(data)
+
+    def write_text(self, value: str) -> None:
+        self.write_blob(value.encode())
+
+    def write_array(self, values: array) -> None:
+        self.write_text(values.typecode)
+        if sys.byteorder == "big":
+            values = array(values.typecode, values)
+            values.byteswap()
+        self.write_blob(values.tobytes())
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.parts)
+
+
+class SnapshotReader:
+    def __init__(self, data: bytes) -> None:
+        self.view = memoryview(data)
+        if self.view[:4] != SNAPSHOT_MAGIC:
+            raise ValueError("Not a stream snapshot.")
+        self.pos = 4
+
+    def _take(self, size: int) -> memoryview:
+        if size < 0 or self.pos + size > len(self.view):
+            raise ValueError("Truncated stream snapshot.")
+        chunk = self.view[self.pos:self.pos + size]
+        self.pos += size
+        return chunk
+
+    def read_int(self) -> int:
+        return struct.unpack("<q", self._take(8))[0]
+
+    def read_float(self) -> float:
+        return struct.unpack("<d", self._take(8))[0]
+
+    def read_blob(self) -> bytes:
+        return bytes(self._take(self.read_int()))
+
+    def read_text(self) -> str:
+        return self.read_blob().decode()
+
+    def read_array(self, typecode: str, length: Optional[int] = None) -> array:
+        found = self.read_text()
+        values = array(typecode)
+        values.frombytes(self.read_blob())
+        if found != typecode or (length is not None and len(values) != length):
+            raise ValueError("Snapshot does not match this stream's layout.")
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
 
 
 class DataStream(ABC):
@@ -12,62 +428,789 @@ class DataStream(ABC):
         self.stream_type = stream_type
         self.stream_uses = tuple(stream_uses)
         self.processed_batches = 0
+        self.items_seen = 0
+        self.items_rejected = 0
+        self.bytes_processed = 0
+        self.total_time_ns = 0
+        self.last_batch_ns = 0
+        self.latency_histogram = array("q", bytes(8 * LATENCY_BUCKETS))
 
     @abstractmethod
-    def process_batch(self, data_batch: List[Any]) -> str:
+    def process_batch(self, data_batch: Batch) -> str:
         raise NotImplementedError
 
+    def process_stream(
+        self, items: Iterable[Any], every: int = 1000
+    ) -> Iterator[str]:
+        """
+        Consume a lazy feed (e.g. a file or socket line reader) and yield
+        the process_batch result for every `every` items, plus one for the
+        final partial chunk. At most one chunk is held in memory; running
+        state (aggregates, windows, sketches) carries across chunks.
+        """
+        # checked here rather than in the generator, so a bad `every`
+        # fails at the call instead of on the first next()
+        if every < 1:
+            raise ValueError(f"every must be at least 1, got {every}.")
+        return self._process_chunks(iter(items), every)
+
+    def _process_chunks(self, it: Iterator[Any], every: int) -> Iterator[str]:
+        while chunk := list(itertools.islice(it, every)):
+            yield self.process_batch(chunk)
+
     def filter_data(
-        self, data_batch: List[Any], criteria: Optional[str] = None
-    ) -> List[Any]:
+        self, data_batch: Batch, criteria: Criteria = None
+    ) -> Batch:
+        """
+        criteria is a substring (legacy) or a Predicate. Predicates on a
+        ColumnarBatch with build_index() done are answered from the index.
+        """
+        if isinstance(data_batch, ColumnarBatch):
+            return self._filter_columns(data_batch, criteria)
         if criteria is None:
             return list(data_batch)
+        if isinstance(criteria, Predicate):
+            columns = ColumnarBatch.from_items(data_batch)
+            return self._filter_columns(columns, criteria).items
         return [item for item in data_batch if criteria in str(item)]
 
-    def get_stats(self) -> Dict[str, Union[str, int]]:
+    def _filter_columns(
+        self, batch: ColumnarBatch, criteria: Criteria
+    ) -> ColumnarBatch:
+        if criteria is None:
+            return batch
+        if isinstance(criteria, Predicate):
+            if batch.index is not None:
+                return batch.take(criteria.lookup(batch.index))
+            categories = batch.categories
+            return batch.take([
+                i for i, (code, value, is_number) in enumerate(
+                    zip(batch.codes, batch.values, batch.numeric, strict=True)
+                )
+                if criteria.matches(categories[code], value, is_number)
+            ])
+        # a key containing criteria matches all its items at once; other
+        # items still need the substring test on their source text
+        hit = [criteria in category for category in batch.categories]
+        items = batch.items
+        return batch.take([
+            i for i, code in enumerate(batch.codes)
+            if hit[code] or criteria in str(items[i])
+        ])
+
+    def _record_batch(
+        self, data_batch: Batch, accepted: int, started_ns: int
+    ) -> None:
+        """
+        Batch-boundary bookkeeping; called once per process_batch so the
+        per-item loops carry no instrumentation.
+        """
+        elapsed = time.perf_counter_ns() - started_ns
+        self.items_seen += len(data_batch)
+        self.items_rejected += len(data_batch) - accepted
+        self.bytes_processed += _batch_bytes(data_batch)
+        self.total_time_ns += elapsed
+        self.last_batch_ns = elapsed
+        bucket = min((elapsed // 1000).bit_length(), LATENCY_BUCKETS - 1)
+        self.latency_histogram[bucket] += 1
+
+    def snapshot(self) -> bytes:
+        """
+        Compact binary copy of the running state (counters plus whatever
+        the subclass aggregates); feed it to restore() after a restart.
+        """
+        writer = SnapshotWriter()
+        writer.write_text(type(self).__name__)
+        writer.write_text(self.stream_id)
+        self._write_state(writer)
+        return writer.getvalue()
+
+    def restore(self, data: bytes) -> None:
+        """
+        Load a snapshot() of this stream. A snapshot that is rejected part
+        way through leaves the stream as it was.
+        """
+        backup = self.snapshot()
+        try:
+            self._restore(data)
+        except Exception:
+            self._restore(backup)
+            raise
+
+    def _restore(self, data: bytes) -> None:
+        reader = SnapshotReader(data)
+        kind, stream_id = reader.read_text(), reader.read_text()
+        if (kind, stream_id) != (type(self).__name__, self.stream_id):
+            raise ValueError(
+                f"Snapshot is for {kind} {stream_id!r}, "
+                f"not {type(self).__name__} {self.stream_id!r}."
+            )
+        self._read_state(reader)
+        if reader.pos != len(reader.view):
+            raise ValueError("Snapshot has trailing data for this stream.")
+
+    def _write_state(self, writer: SnapshotWriter) -> None:
+        for n in (
+            self.processed_batches, self.items_seen, self.items_rejected,
+            self.bytes_processed, self.total_time_ns, self.last_batch_ns,
+        ):
+            writer.write_int(n)
+        writer.write_array(self.latency_histogram)
+
+    def _read_state(self, reader: SnapshotReader) -> None:
+        (
+            self.processed_batches, self.items_seen, self.items_rejected,
+            self.bytes_processed, self.total_time_ns, self.last_batch_ns,
+        ) = (reader.read_int() for _ in range(6))
+        self.latency_histogram[:] = reader.read_array("q", LATENCY_BUCKETS)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        latency_histogram maps an upper bound ("<2us", "<4us", ...) to the
+        number of batches that finished under it; empty buckets are left
+        out.
+        """
         return {
             "stream_id": self.stream_id,
             "processed_batches": self.processed_batches,
+            "items_seen": self.items_seen,
+            "items_rejected": self.items_rejected,
+            "bytes_processed": self.bytes_processed,
+            "total_time_ms": self.total_time_ns / 1e6,
+            "last_batch_ms": self.last_batch_ns / 1e6,
+            "latency_histogram": {
+                f"<{1 << bucket}us": n
+                for bucket, n in enumerate(self.latency_histogram) if n
+            },
+        }
+
+
+class MetricSummary(NamedTuple):
+    count: int
+    total: float
+    mean: float
+    minimum: float
+    maximum: float
+
+
+class MetricAggregator:
+    """
+    Running count/sum/min/max per metric across batches. Each metric owns
+    one slot in four parallel arrays, so a summary is an O(1) lookup and
+    no reading history is kept.
+    """
+
+    def __init__(self) -> None:
+        self.slots: Dict[str, int] = {}
+        self.counts = array("q")
+        self.sums = array("d")
+        self.mins = array("d")
+        self.maxs = array("d")
+
+    def _slot(self, metric: str) -> int:
+        slot = self.slots.get(metric)
+        if slot is None:
+            slot = self.slots[metric] = len(self.counts)
+            self.counts.append(0)
+            self.sums.append(0.0)
+            self.mins.append(math.inf)
+            self.maxs.append(-math.inf)
+        return slot
+
+    def add(self, metric: str, values: List[float]) -> None:
+        if not values:
+            return
+        slot = self._slot(metric)
+        self.counts[slot] += len(values)
+        self.sums[slot] += sum(values)
+        self.mins[slot] = min(self.mins[slot], min(values))
+        self.maxs[slot] = max(self.maxs[slot], max(values))
+
+    def update(self, readings: Dict[str, List[float]]) -> None:
+        for metric, values in readings.items():
+            self.add(metric, values)
+
+    def summary(self, metric: str) -> Optional[MetricSummary]:
+        slot = self.slots.get(metric)
+        if slot is None:
+            return None
+        count = self.counts[slot]
+        total = self.sums[slot]
+        return MetricSummary(
+            count, total, total / count, self.mins[slot], self.maxs[slot]
+        )
+
+    def write(self, writer: SnapshotWriter) -> None:
+        writer.write_int(len(self.slots))
+        for metric in self.slots:  # dict order == slot order
+            writer.write_text(metric)
+        for column in (self.counts, self.sums, self.mins, self.maxs):
+            writer.write_array(column)
+
+    def read(self, reader: SnapshotReader) -> None:
+        metrics = [reader.read_text() for _ in range(reader.read_int())]
+        self.slots.clear()
+        self.slots.update(
+            (metric, slot) for slot, metric in enumerate(metrics)
+        )
+        self.counts[:] = reader.read_array("q", len(metrics))
+        self.sums[:] = reader.read_array("d", len(metrics))
+        self.mins[:] = reader.read_array("d", len(metrics))
+        self.maxs[:] = reader.read_array("d", len(metrics))
+
+    def summaries(self) -> Dict[str, MetricSummary]:
+        return {
+            metric: summary
+            for metric in self.slots
+            if (summary := self.summary(metric)) is not None
         }
 
 
+class SensorWindow(NamedTuple):
+    start: float
+    end: float
+    metrics: Dict[str, MetricSummary]
+
+
+TimedReading = Tuple[float, str, float]  # (event time, metric, value)
+
+
+class EventTimeWindows:
+    """
+    Tumbling event-time windows of `size` seconds for out-of-order
+    readings. The watermark trails the largest event time seen by
+    `allowed_lateness`; a window is emitted to `closed` once the watermark
+    passes its end, and readings for an already emitted window are late
+    and dropped (counted in late_readings).
+
+    Open windows hold per-metric aggregates rather than the readings
+    themselves, and at most allowed_lateness / size + 1 of them are open,
+    so memory is bounded by the lateness, not by the disorder.
+
+    `closed` only keeps the last `history` windows. Every emitted window
+    also goes to on_close (called where the stream lives), and
+    last_emitted holds all windows closed by the latest add().
+    """
+
+    def __init__(
+        self,
+        size: float,
+        allowed_lateness: float = 0.0,
+        history: int = 16,
+        on_close: Optional[Callable[[SensorWindow], None]] = None,
+    ) -> None:
+        self.size = size
+        self.allowed_lateness = allowed_lateness
+        self.on_close = on_close
+        self.max_event_time = -math.inf
+        self.watermark = -math.inf
+        self.open: Dict[int, MetricAggregator] = {}
+        self.closed: Deque[SensorWindow] = deque(maxlen=history)
+        self.last_emitted: List[SensorWindow] = []
+        self.late_readings = 0
+
+    def add(self, readings: List[TimedReading]) -> int:
+        """
+        Assign readings to windows against the current watermark, then
+        advance it past the batch; returns how many were late.
+        """
+        grouped: Dict[int, Dict[str, List[float]]] = {}
+        size, watermark = self.size, self.watermark
+        newest = -math.inf
+        late = 0
+        for timestamp, metric, value in readings:
+            if timestamp > newest:
+                newest = timestamp
+            window = int(timestamp // size)
+            if (window + 1) * size <= watermark:
+                late += 1
+                continue
+            grouped.setdefault(window, {}).setdefault(metric, []).append(
+                value
+            )
+
+        for window, metrics in grouped.items():
+            aggregator = self.open.get(window)
+            if aggregator is None:
+                aggregator = self.open[window] = MetricAggregator()
+            aggregator.update(metrics)
+        self.late_readings += late
+        self.last_emitted = self.advance(newest)
+        return late
+
+    def advance(self, event_time: float) -> List[SensorWindow]:
+        """Move the watermark up to event_time - allowed_lateness."""
+        if event_time > self.max_event_time:
+            self.max_event_time = event_time
+            self.watermark = event_time - self.allowed_lateness
+        return self._close(self.watermark)
+
+    def flush(self) -> List[SensorWindow]:
+        """Emit every open window (end of stream)."""
+        return self._close(math.inf)
+
+    def _close(self, watermark: float) -> List[SensorWindow]:
+        emitted: List[SensorWindow] = []
+        for window in sorted(self.open):
+            start, end = window * self.size, (window + 1) * self.size
+            if end > watermark:
+                break
+            aggregator = self.open.pop(window)
+            emitted.append(SensorWindow(start, end, aggregator.summaries()))
+        self.closed.extend(emitted)
+        if self.on_close is not None:
+            for window in emitted:
+                self.on_close(window)
+        return emitted
+
+    def write(self, writer: SnapshotWriter) -> None:
+        writer.write_float(self.max_event_time)
+        writer.write_float(self.watermark)
+        writer.write_int(self.late_readings)
+        writer.write_int(len(self.open))
+        for window, aggregator in self.open.items():
+            writer.write_int(window)
+            aggregator.write(writer)
+        self._write_windows(writer, self.closed)
+        self._write_windows(writer, self.last_emitted)
+
+    @staticmethod
+    def _write_windows(
+        writer: SnapshotWriter, windows: Iterable[SensorWindow]
+    ) -> None:
+        windows = list(windows)
+        writer.write_int(len(windows))
+        for window in windows:
+            writer.write_float(window.start)
+            writer.write_float(window.end)
+            writer.write_int(len(window.metrics))
+            for metric, summary in window.metrics.items():
+                writer.write_text(metric)
+                writer.write_int(summary.count)
+                for x in summary[1:]:
+                    writer.write_float(x)
+
+    def read(self, reader: SnapshotReader) -> None:
+        self.max_event_time = reader.read_float()
+        self.watermark = reader.read_float()
+        self.late_readings = reader.read_int()
+        self.open.clear()
+        for _ in range(reader.read_int()):
+            window = reader.read_int()
+            aggregator = self.open[window] = MetricAggregator()
+            aggregator.read(reader)
+        self.closed.clear()
+        self.closed.extend(self._read_windows(reader))
+        self.last_emitted[:] = self._read_windows(reader)
+
+    @staticmethod
+    def _read_windows(reader: SnapshotReader) -> List[SensorWindow]:
+        windows: List[SensorWindow] = []
+        for _ in range(reader.read_int()):
+            start, end = reader.read_float(), reader.read_float()
+            metrics: Dict[str, MetricSummary] = {}
+            for _ in range(reader.read_int()):
+                metric = reader.read_text()
+                metrics[metric] = MetricSummary(
+                    reader.read_int(),
+                    *(reader.read_float() for _ in range(4)),
+                )
+            windows.append(SensorWindow(start, end, metrics))
+        return windows
+
+
 class SensorStream(DataStream):
     DEFAULT_ID = "SENSOR_001"
     DEFAULT_TYPE = "Environmental Data"
     DEFAULT_USES = ("temp", "humidity", "pressure")
 
-    def __init__(self, stream_id: str = DEFAULT_ID) -> None:
+    def __init__(
+        self,
+        stream_id: str = DEFAULT_ID,
+        event_time: Optional[EventTimeWindows] = None,
+    ) -> None:
+        """
+        With event_time, items are "[tag:]metric:value@timestamp" and
+        every reading also lands in its event-time window. Items without
+        a timestamp are rejected: arrival time is in other units than the
+        devices' clocks and would drag the watermark along with it.
+        """
         super().__init__(
             stream_id=stream_id,
             stream_type=self.DEFAULT_TYPE,
             stream_uses=self.DEFAULT_USES,
         )
+        self.metrics = MetricAggregator()
+        self.event_time = event_time
 
-    def process_batch(self, data_batch: List[Any]) -> str:
-        values: List[float] = []
-        for item in data_batch:
-            s = str(item).strip()
+    def _write_state(self, writer: SnapshotWriter) -> None:
+        super()._write_state(writer)
+        self.metrics.write(writer)
+        writer.write_int(self.event_time is not None)
+        if self.event_time is not None:
+            self.event_time.write(writer)
+
+    def _read_state(self, reader: SnapshotReader) -> None:
+        super()._read_state(reader)
+        self.metrics.read(reader)
+        if bool(reader.read_int()) != (self.event_time is not None):
+            raise ValueError("Snapshot event-time mode does not match.")
+        if self.event_time is not None:
+            self.event_time.read(reader)
+
+    def parse_readings(self, data_batch: Batch) -> Dict[str, List[float]]:
+        """
+        "[tag:]metric:value" items -> {metric: [values]} in a single pass.
+        str()/strip() only run for non-str items and for the first sight of
+        each raw metric name; later readings go straight to a cached
+        list.append of their metric.
+        """
+        if isinstance(data_batch, ColumnarBatch):
+            return data_batch.group_values(
+                lambda key: key.rpartition(":")[2].strip()
+            )
+        if isinstance(data_batch, RawBatch):
+            return self._parse_raw(data_batch)
 
-            parts = s.split(":")
+        readings: Dict[str, List[float]] = {}
+        appenders: Dict[str, Callable[[float], None]] = {}
+
+        for item in data_batch:
+            try:
+                parts = item.split(":")
+            except (AttributeError, TypeError):
+                parts = str(item).split(":")
             if len(parts) < 2:
                 continue
 
-            last = parts[-1]
             try:
-                values.append(float(last))
+                value = float(parts[-1])
             except ValueError:
                 continue
 
-        if not values:
+            try:
+                appenders[parts[-2]](value)
+            except KeyError:
+                column = readings.setdefault(parts[-2].strip(), [])
+                appenders[parts[-2]] = column.append
+                column.append(value)
+
+        return readings
+
+    def _parse_raw(self, batch: RawBatch) -> Dict[str, List[float]]:
+        # float() parses the byte slice directly; a metric name is decoded
+        # once, the first time its raw key shows up
+        readings: Dict[str, List[float]] = {}
+        appenders: Dict[bytes, Callable[[float], None]] = {}
+
+        for record in batch.records:
+            key, sep, raw = record.rpartition(b":")
+            if not sep:
+                continue
+            try:
+                value = float(raw)
+            except ValueError:
+                continue
+
+            try:
+                appenders[key](value)
+            except KeyError:
+                metric = key.rpartition(b":")[2].decode(errors="replace")
+                column = readings.setdefault(metric.strip(), [])
+                appenders[key] = column.append
+                column.append(value)
+
+        return readings
+
+    def parse_timed_readings(self, data_batch: Batch) -> List[TimedReading]:
+        """
+        "[tag:]metric:value@timestamp" items -> (time, metric, value).
+        An item with a missing, malformed or non-finite timestamp is
+        rejected.
+        """
+        records: Iterable[Any]
+        if isinstance(data_batch, RawBatch):
+            records, at, colon = data_batch.records, b"@", b":"
+        else:
+            items = (
+                data_batch.items if isinstance(data_batch, ColumnarBatch)
+                else data_batch
+            )
+            records = (
+                item if isinstance(item, str) else str(item) for item in items
+            )
+            at, colon = "@", ":"
+
+        metrics: Dict[Any, str] = {}
+        timed: List[TimedReading] = []
+        for record in records:
+            body, sep, stamp = record.rpartition(at)
+            if not sep:
+                continue
+            try:
+                timestamp = float(stamp)
+            except ValueError:
+                continue
+            if not math.isfinite(timestamp):
+                continue
+
+            key, sep, raw = body.rpartition(colon)
+            if not sep:
+                continue
+            try:
+                value = float(raw)
+            except ValueError:
+                continue
+
+            metric = metrics.get(key)
+            if metric is None:
+                name = (
+                    key.decode(errors="replace") if isinstance(key, bytes)
+                    else key
+                )
+                metric = metrics[key] = name.rpartition(":")[2].strip()
+            timed.append((timestamp, metric, value))
+
+        return timed
+
+    def process_batch(self, data_batch: Batch) -> str:
+        started = time.perf_counter_ns()
+        late = 0
+        if self.event_time is None:
+            readings = self.parse_readings(data_batch)
+        else:
+            timed = self.parse_timed_readings(data_batch)
+            readings = {}
+            for _, metric, value in timed:
+                readings.setdefault(metric, []).append(value)
+            late = self.event_time.add(timed)
+        count = sum(len(column) for column in readings.values())
+        self._record_batch(data_batch, count, started)
+        if not count:
             return "Sensor processing error (no numeric readings found)."
 
-        avg = sum(values) / len(values)
         self.processed_batches += 1
+        self.metrics.update(readings)
+        late_note = f", {late} late for their window" if late else ""
+        temps = readings.get("temp")
+        if not temps:
+            return (
+                f"Sensor analysis: {count} readings processed, "
+                f"no temp readings{late_note}"
+            )
+        avg = sum(temps) / len(temps)
         return (
-            f"Sensor analysis: {len(values)} readings processed, "
-            f"avg temp: {avg:.1f}°C"
+            f"Sensor analysis: {count} readings processed, "
+            f"avg temp: {avg:.1f}°C{late_note}"
         )
 
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        if self.event_time is not None:
+            stats["watermark"] = self.event_time.watermark
+            stats["open_windows"] = len(self.event_time.open)
+            stats["late_readings"] = self.event_time.late_readings
+        return stats
+
+
+class WindowTotals(NamedTuple):
+    start: float
+    end: float
+    buy: float
+    sell: float
+    count: int
+
+
+class TransactionWindow(ABC):
+    """
+    Buy/sell totals over a window of transactions. Tumbling windows push
+    each finished window to `closed` (bounded by history); sliding windows
+    keep per-slot amounts in ring buffers and update running totals, so
+    advancing costs O(1) per event instead of re-summing the window.
+    """
+
+    def __init__(self, *, tumbling: bool, history: int) -> None:
+        self.tumbling = tumbling
+        self.closed: Deque[WindowTotals] = deque(maxlen=history)
+        self.buy = 0.0
+        self.sell = 0.0
+        self.count = 0
+
+    @abstractmethod
+    def add(self, timestamp: float, buy: float, sell: float) -> None:
+        raise NotImplementedError
+
+    def totals(self) -> Tuple[float, float]:
+        return self.buy, self.sell
+
+    def write(self, writer: SnapshotWriter) -> None:
+        writer.write_float(self.buy)
+        writer.write_float(self.sell)
+        writer.write_int(self.count)
+        writer.write_int(len(self.closed))
+        for window in self.closed:
+            writer.write_float(window.start)
+            writer.write_float(window.end)
+            writer.write_float(window.buy)
+            writer.write_float(window.sell)
+            writer.write_int(window.count)
+
+    def read(self, reader: SnapshotReader) -> None:
+        self.buy, self.sell = reader.read_float(), reader.read_float()
+        self.count = reader.read_int()
+        self.closed.clear()
+        for _ in range(reader.read_int()):
+            self.closed.append(WindowTotals(
+                reader.read_float(), reader.read_float(),
+                reader.read_float(), reader.read_float(), reader.read_int(),
+            ))
+
+
+class CountWindow(TransactionWindow):
+    """Window over the last `size` transactions."""
+
+    def __init__(
+        self, size: int, *, tumbling: bool = False, history: int = 16
+    ) -> None:
+        super().__init__(tumbling=tumbling, history=history)
+        self.size = size
+        self.seen = 0
+        self.pos = 0
+        if not tumbling:
+            self.buys = array("d", bytes(8 * size))
+            self.sells = array("d", bytes(8 * size))
+
+    def write(self, writer: SnapshotWriter) -> None:
+        super().write(writer)
+        writer.write_int(self.seen)
+        writer.write_int(self.pos)
+        if not self.tumbling:
+            writer.write_array(self.buys)
+            writer.write_array(self.sells)
+
+    def read(self, reader: SnapshotReader) -> None:
+        super().read(reader)
+        self.seen, self.pos = reader.read_int(), reader.read_int()
+        if not self.tumbling:
+            self.buys[:] = reader.read_array("d", self.size)
+            self.sells[:] = reader.read_array("d", self.size)
+
+    def add(self, timestamp: float, buy: float, sell: float) -> None:
+        self.seen += 1
+        if self.tumbling:
+            self.buy += buy
+            self.sell += sell
+            self.count += 1
+            if self.count == self.size:
+                self.closed.append(WindowTotals(
+                    self.seen - self.size, self.seen,
+                    self.buy, self.sell, self.count,
+                ))
+                self.buy = self.sell = 0.0
+                self.count = 0
+            return
+
+        pos = self.pos
+        self.buy += buy - self.buys[pos]
+        self.sell += sell - self.sells[pos]
+        self.buys[pos] = buy
+        self.sells[pos] = sell
+        self.count = min(self.count + 1, self.size)
+        self.pos = pos = (pos + 1) % self.size
+        if pos == 0:
+            # once per lap: drop float drift from the running totals
+            self.buy = math.fsum(self.buys)
+            self.sell = math.fsum(self.sells)
+
+
+class TimeWindow(TransactionWindow):
+    """
+    Window over the last `span` seconds. The sliding variant splits the
+    span into `slots` buckets, so eviction is bucket-granular.
+    """
+
+    def __init__(
+        self, span: float, slots: int = 60, *, tumbling: bool = False,
+        history: int = 16,
+    ) -> None:
+        super().__init__(tumbling=tumbling, history=history)
+        self.span = span
+        self.slots = slots
+        self.width = span / slots
+        self.head: Optional[int] = None
+        if not tumbling:
+            self.buys = array("d", bytes(8 * slots))
+            self.sells = array("d", bytes(8 * slots))
+            self.counts = array("q", bytes(8 * slots))
+
+    def write(self, writer: SnapshotWriter) -> None:
+        super().write(writer)
+        writer.write_int(self.head is not None)
+        writer.write_int(self.head or 0)
+        if not self.tumbling:
+            writer.write_array(self.buys)
+            writer.write_array(self.sells)
+            writer.write_array(self.counts)
+
+    def read(self, reader: SnapshotReader) -> None:
+        super().read(reader)
+        has_head, head = reader.read_int(), reader.read_int()
+        self.head = head if has_head else None
+        if not self.tumbling:
+            self.buys[:] = reader.read_array("d", self.slots)
+            self.sells[:] = reader.read_array("d", self.slots)
+            self.counts[:] = reader.read_array("q", self.slots)
+
+    def _close_tumbling(self, window: int) -> None:
+        if self.head is not None and window <= self.head:
+            return  # late events count towards the open window
+        if self.head is not None:
+            self.closed.append(WindowTotals(
+                self.head * self.span, (self.head + 1) * self.span,
+                self.buy, self.sell, self.count,
+            ))
+            self.buy = self.sell = 0.0
+            self.count = 0
+        self.head = window
+
+    def advance(self, now: float) -> None:
+        """Move the window end to `now`, evicting buckets that fell out."""
+        if self.tumbling:
+            self._close_tumbling(int(now // self.span))
+            return
+        slot = int(now // self.width)
+        if self.head is None:
+            self.head = slot
+            return
+        if slot <= self.head:
+            return
+        for k in range(self.head + 1, self.head + 1 +
+                       min(slot - self.head, self.slots)):
+            i = k % self.slots
+            self.buy -= self.buys[i]
+            self.sell -= self.sells[i]
+            self.count -= self.counts[i]
+            self.buys[i] = self.sells[i] = 0.0
+            self.counts[i] = 0
+        if slot // self.slots != self.head // self.slots:
+            self.buy = math.fsum(self.buys)
+            self.sell = math.fsum(self.sells)
+        self.head = slot
+
+    def add(self, timestamp: float, buy: float, sell: float) -> None:
+        self.advance(timestamp)
+        if not self.tumbling:
+            slot = int(timestamp // self.width)
+            if self.head is not None and slot <= self.head - self.slots:
+                return  # older than the whole window
+            i = slot % self.slots
+            self.buys[i] += buy
+            self.sells[i] += sell
+            self.counts[i] += 1
+        self.buy += buy
+        self.sell += sell
+        self.count += 1
+
 
 class TransactionStream(DataStream):
     DEFAULT_ID = "TRANS_001"
@@ -80,11 +1223,46 @@ class TransactionStream(DataStream):
             stream_type=self.DEFAULT_TYPE,
             stream_uses=self.DEFAULT_USES,
         )
+        self.windows: List[TransactionWindow] = []
+        self.clock: Callable[[], float] = time.time
+
+    def _write_state(self, writer: SnapshotWriter) -> None:
+        """Windows are saved by position; register them before restore()."""
+        super()._write_state(writer)
+        writer.write_int(len(self.windows))
+        for window in self.windows:
+            writer.write_text(type(window).__name__)
+            window.write(writer)
+
+    def _read_state(self, reader: SnapshotReader) -> None:
+        super()._read_state(reader)
+        if reader.read_int() != len(self.windows):
+            raise ValueError("Snapshot window count does not match.")
+        for window in self.windows:
+            if reader.read_text() != type(window).__name__:
+                raise ValueError("Snapshot window kind does not match.")
+            window.read(reader)
+
+    def add_window(self, window: TransactionWindow) -> TransactionWindow:
+        """
+        Feed every buy/sell of later batches into window; time windows use
+        the batch arrival time from self.clock.
+        """
+        self.windows.append(window)
+        return window
+
+    def _feed_windows(self, action: str, value: float, now: float) -> None:
+        buy = value if action == "buy" else 0.0
+        sell = value if action == "sell" else 0.0
+        for window in self.windows:
+            window.add(now, buy, sell)
 
-    def process_batch(self, data_batch: List[Any]) -> str:
-        amounts: List[float] = []
+    def _parse_items(self, data_batch: List[Any]) -> Tuple[int, float, float]:
+        count = 0
         buy_total = 0.0
         sell_total = 0.0
+        windowed = bool(self.windows)
+        now = self.clock()
 
         for item in data_batch:
             s = str(item).strip()
@@ -100,13 +1278,76 @@ class TransactionStream(DataStream):
             except ValueError:
                 continue
 
-            amounts.append(value)
+            count += 1
             if action == "buy":
                 buy_total += value
             elif action == "sell":
                 sell_total += value
+            else:
+                continue
+            if windowed:
+                self._feed_windows(action, value, now)
+
+        return count, buy_total, sell_total
+
+    def _parse_raw(self, batch: RawBatch) -> Tuple[int, float, float]:
+        count = 0
+        buy_total = 0.0
+        sell_total = 0.0
+        windowed = bool(self.windows)
+        now = self.clock()
+
+        for record in batch.records:
+            action, sep, raw = record.partition(b":")
+            if not sep:
+                continue
+            try:
+                value = float(raw)
+            except ValueError:
+                continue
+
+            count += 1
+            action = action.strip().lower()
+            if action == b"buy":
+                buy_total += value
+                if windowed:
+                    self._feed_windows("buy", value, now)
+            elif action == b"sell":
+                sell_total += value
+                if windowed:
+                    self._feed_windows("sell", value, now)
+
+        return count, buy_total, sell_total
+
+    def _parse_columns(self, batch: ColumnarBatch) -> Tuple[int, float, float]:
+        # legacy split(":", 1) semantics: a key with a ":" has no number
+        groups = batch.group_values(
+            lambda key: None if ":" in key else key.lower()
+        )
+        count = sum(len(values) for values in groups.values())
+
+        if self.windows:
+            now = self.clock()
+            actions = [key.lower() for key in batch.categories]
+            for code, value, is_number in zip(
+                batch.codes, batch.values, batch.numeric, strict=True
+            ):
+                if is_number and actions[code] in ("buy", "sell"):
+                    self._feed_windows(actions[code], value, now)
+
+        return count, sum(groups.get("buy", ())), sum(groups.get("sell", ()))
+
+    def process_batch(self, data_batch: Batch) -> str:
+        started = time.perf_counter_ns()
+        if isinstance(data_batch, ColumnarBatch):
+            count, buy_total, sell_total = self._parse_columns(data_batch)
+        elif isinstance(data_batch, RawBatch):
+            count, buy_total, sell_total = self._parse_raw(data_batch)
+        else:
+            count, buy_total, sell_total = self._parse_items(data_batch)
+        self._record_batch(data_batch, count, started)
 
-        if not amounts:
+        if not count:
             return (
                 "Transaction processing error (no numeric transactions found)."
             )
@@ -115,67 +1356,925 @@ class TransactionStream(DataStream):
         self.processed_batches += 1
         sign = "+" if net >= 0 else ""
         return (
-            f"Transaction analysis: {len(amounts)} operations, "
+            f"Transaction analysis: {count} operations, "
             f"net flow: {sign}{net:.0f} units"
         )
 
 
+# =========================
+# Approximate event counting
+# =========================
+
+def _hash64(key: str) -> int:
+    # stable across processes (unlike hash()), so sketches can be merged
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class CountMinSketch:
+    """
+    Frequency estimates that never undercount and overcount by at most
+    epsilon * total with probability 1 - delta.
+    """
+
+    def __init__(self, epsilon: float = 0.001, delta: float = 0.01) -> None:
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.rows = [array("q", bytes(8 * self.width))
+                     for _ in range(self.depth)]
+
+    def _columns(self, h: int) -> List[int]:
+        # Kirsch-Mitzenmacher: row i uses h1 + i * h2
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, h: int, count: int = 1) -> None:
+        for row, col in zip(self.rows, self._columns(h), strict=True):
+            row[col] += count
+
+    def estimate(self, h: int) -> int:
+        return min(
+            row[col] for row, col in zip(self.rows, self._columns(h),
+                                         strict=True)
+        )
+
+    def memory_bytes(self) -> int:
+        return 8 * self.width * self.depth
+
+    def write(self, writer: SnapshotWriter) -> None:
+        for row in self.rows:
+            writer.write_array(row)
+
+    def read(self, reader: SnapshotReader) -> None:
+        for row in self.rows:
+            row[:] = reader.read_array("q", self.width)
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters in k counters. A reported count overestimates the
+    true one by at most total / k.
+    """
+
+    def __init__(self, k: int = 10) -> None:
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        # (count, key) min-heap; entries go stale as counts grow and are
+        # refreshed lazily when an eviction looks at them
+        self.heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1) -> None:
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+            return
+        if len(counts) < self.k:
+            counts[key] = count
+            heapq.heappush(self.heap, (count, key))
+            return
+
+        while True:
+            old, victim = self.heap[0]
+            current = counts[victim]
+            if old == current:
+                break
+            heapq.heapreplace(self.heap, (current, victim))
+        del counts[victim]
+        counts[key] = current + count
+        heapq.heapreplace(self.heap, (current + count, key))
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: -kv[1])
+        return ranked if n is None else ranked[:n]
+
+    def write(self, writer: SnapshotWriter) -> None:
+        writer.write_int(len(self.counts))
+        for key, count in self.counts.items():
+            writer.write_text(key)
+            writer.write_int(count)
+
+    def read(self, reader: SnapshotReader) -> None:
+        size = reader.read_int()
+        if size > self.k:
+            raise ValueError("Snapshot has more counters than top_k.")
+        self.counts.clear()
+        for _ in range(size):
+            key = reader.read_text()
+            self.counts[key] = reader.read_int()
+        self.heap[:] = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self.heap)
+
+
+class HyperLogLog:
+    """Distinct count with standard error about 1.04 / sqrt(2**precision)."""
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, h: int) -> None:
+        index = h >> (64 - self.precision)
+        rest = (h << self.precision) & 0xFFFFFFFFFFFFFFFF
+        # position of the first 1 bit after the index bits
+        rank = min(65 - rest.bit_length(), 65 - self.precision)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting
+        return round(raw)
+
+    def memory_bytes(self) -> int:
+        return self.m
+
+    def write(self, writer: SnapshotWriter) -> None:
+        writer.write_blob(bytes(self.registers))
+
+    def read(self, reader: SnapshotReader) -> None:
+        registers = reader.read_blob()
+        if len(registers) != self.m:
+            raise ValueError("Snapshot HyperLogLog precision differs.")
+        self.registers[:] = registers
+
+
+class EventSketch:
+    """
+    Bounded-memory replacement for exact per-event counts: Count-Min for
+    any event's frequency, Space-Saving for the top-k events and
+    HyperLogLog for the number of distinct events.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 10,
+        epsilon: float = 0.001,
+        delta: float = 0.01,
+        precision: int = 12,
+    ) -> None:
+        self.frequencies = CountMinSketch(epsilon, delta)
+        self.heavy_hitters = SpaceSaving(top_k)
+        self.cardinality = HyperLogLog(precision)
+        self.total = 0
+
+    def add(self, event: str, count: int = 1) -> None:
+        h = _hash64(event)
+        self.frequencies.add(h, count)
+        self.heavy_hitters.add(event, count)
+        self.cardinality.add(h)
+        self.total += count
+
+    def estimate(self, event: str) -> int:
+        return self.frequencies.estimate(_hash64(event))
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        return self.heavy_hitters.top(n)
+
+    def distinct(self) -> int:
+        return self.cardinality.count()
+
+    def memory_bytes(self) -> int:
+        return (
+            self.frequencies.memory_bytes()
+            + self.cardinality.memory_bytes()
+        )
+
+    def write(self, writer: SnapshotWriter) -> None:
+        writer.write_int(self.total)
+        self.frequencies.write(writer)
+        self.heavy_hitters.write(writer)
+        self.cardinality.write(writer)
+
+    def read(self, reader: SnapshotReader) -> None:
+        self.total = reader.read_int()
+        self.frequencies.read(reader)
+        self.heavy_hitters.read(reader)
+        self.cardinality.read(reader)
+
+
 class EventStream(DataStream):
     DEFAULT_ID = "EVENT_001"
     DEFAULT_TYPE = "System Events"
     DEFAULT_USES = ("login", "error", "logout")
 
-    def __init__(self, stream_id: str = DEFAULT_ID) -> None:
+    def __init__(
+        self, stream_id: str = DEFAULT_ID, sketch: Optional[EventSketch] = None
+    ) -> None:
+        """
+        With a sketch, batches update it instead of building an exact
+        per-event dict; only the total and "error" counts stay exact.
+        """
         super().__init__(
             stream_id=stream_id,
             stream_type=self.DEFAULT_TYPE,
             stream_uses=self.DEFAULT_USES,
         )
+        self.sketch = sketch
 
-    def process_batch(self, data_batch: List[Any]) -> str:
+    def _write_state(self, writer: SnapshotWriter) -> None:
+        super()._write_state(writer)
+        writer.write_int(self.sketch is not None)
+        if self.sketch is not None:
+            self.sketch.write(writer)
+
+    def _read_state(self, reader: SnapshotReader) -> None:
+        super()._read_state(reader)
+        if bool(reader.read_int()) != (self.sketch is not None):
+            raise ValueError("Snapshot sketch mode does not match.")
+        if self.sketch is not None:
+            self.sketch.read(reader)
+
+    def _count_columns(self, batch: ColumnarBatch) -> Dict[str, int]:
+        per_code = [0] * len(batch.categories)
         counts: Dict[str, int] = {}
-        total = 0
+        items = batch.items
+        for i, (code, is_number) in enumerate(
+            zip(batch.codes, batch.numeric, strict=True)
+        ):
+            if is_number:
+                # "name:123" keeps its full text as the event name
+                evt = str(items[i]).strip().lower()
+                counts[evt] = counts.get(evt, 0) + 1
+            else:
+                per_code[code] += 1
 
+        for category, n in zip(batch.categories, per_code, strict=True):
+            if n and category:
+                evt = category.lower()
+                counts[evt] = counts.get(evt, 0) + n
+        return counts
+
+    def _count_items(self, data_batch: List[Any]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
         for item in data_batch:
             evt = str(item).strip().lower()
             if not evt:
                 continue
             counts[evt] = counts.get(evt, 0) + 1
-            total += 1
+        return counts
+
+    def _count_raw(self, batch: RawBatch) -> Dict[str, int]:
+        # count raw records at C speed, then decode each distinct one once
+        counts: Dict[str, int] = {}
+        for record, n in Counter(batch.records).items():
+            evt = record.decode(errors="replace").strip().lower()
+            if evt:
+                counts[evt] = counts.get(evt, 0) + n
+        return counts
+
+    def process_batch(self, data_batch: Batch) -> str:
+        started = time.perf_counter_ns()
+        if isinstance(data_batch, RawBatch):
+            counts = self._count_raw(data_batch)
+        elif isinstance(data_batch, ColumnarBatch):
+            counts = self._count_columns(data_batch)
+        else:
+            counts = self._count_items(data_batch)
+        # one weighted update per distinct event, lightest first so the
+        # batch's heaviest events are the ones left in the top-k counters
+        if self.sketch is not None:
+            for evt, n in sorted(counts.items(), key=lambda kv: kv[1]):
+                self.sketch.add(evt, n)
+        total, errors = sum(counts.values()), counts.get("error", 0)
+        self._record_batch(data_batch, total, started)
 
         if total == 0:
             return "Event processing error (empty batch)."
 
         self.processed_batches += 1
 
-        errors = counts.get("error", 0)
         error_word = "error" if errors == 1 else "errors"
         return (
             f"Event analysis: {total} events, {errors} {error_word} detected"
         )
 
 
+EXECUTORS: Dict[str, Callable[[Optional[int]], Executor]] = {
+    "thread": lambda n: ThreadPoolExecutor(max_workers=n),
+    "process": lambda n: ProcessPoolExecutor(max_workers=n),
+}
+
+
+class _FixedClock:
+    """Picklable stand-in for a stream clock, read once at submit time."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _timed_batch(
+    stream: DataStream, batch: Batch, *, send_back: bool
+) -> Tuple[str, int, Optional[bytes]]:
+    """
+    Worker body. A process-pool worker mutates a copy of the stream, so
+    it sends back a snapshot() for the coordinator to restore() into the
+    original objects.
+    """
+    start = time.perf_counter_ns()
+    result = stream.process_batch(batch)
+    elapsed = time.perf_counter_ns() - start
+    return result, elapsed, stream.snapshot() if send_back else None
+
+
+class StreamCheckpointer:
+    """
+    Periodic on-disk snapshots, one `<stream_id>.snap` file per stream.
+
+    maybe_checkpoint() is called at batch boundaries: when the interval
+    has passed it serializes every stream right there (an in-memory copy,
+    so no batch observes a half-written state) and hands the bytes to a
+    background thread, which writes each file to a temp name and renames
+    it over the old one. A crash mid-write leaves the previous snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.clock = clock
+        self.last_checkpoint = clock()
+        self.checkpoints = 0
+        self.errors: List[str] = []
+        self.pending: "queue.Queue[Optional[Dict[str, bytes]]]" = (
+            queue.Queue()
+        )
+        self.writer = threading.Thread(
+            target=self._write_loop, name="stream-checkpointer", daemon=True
+        )
+        self.writer.start()
+
+    def path(self, stream_id: str) -> Path:
+        return self.directory / f"{stream_id}.snap"
+
+    def restore(self, streams: Iterable[DataStream]) -> List[str]:
+        """
+        Load the saved state of each stream that has one; returns ids.
+        All or nothing: if one file is rejected, the streams restored
+        before it get their previous state back.
+        """
+        backups: List[Tuple[DataStream, bytes]] = []
+        try:
+            for stream in streams:
+                path = self.path(stream.stream_id)
+                if path.exists():
+                    backup = stream.snapshot()
+                    stream.restore(path.read_bytes())
+                    backups.append((stream, backup))
+        except Exception:
+            for stream, backup in backups:
+                stream.restore(backup)
+            raise
+        return [stream.stream_id for stream, _ in backups]
+
+    def maybe_checkpoint(self, streams: Iterable[DataStream]) -> bool:
+        if self.clock() - self.last_checkpoint < self.interval:
+            return False
+        self.checkpoint(streams)
+        return True
+
+    def checkpoint(self, streams: Iterable[DataStream]) -> None:
+        self.pending.put({s.stream_id: s.snapshot() for s in streams})
+        self.last_checkpoint = self.clock()
+        self.checkpoints += 1
+
+    def _write_loop(self) -> None:
+        while True:
+            snapshots = self.pending.get()
+            try:
+                if snapshots is None:
+                    return
+                for stream_id, data in snapshots.items():
+                    path = self.path(stream_id)
+                    tmp = path.with_suffix(".tmp")
+                    tmp.write_bytes(data)
+                    os.replace(tmp, path)
+            except OSError as e:
+                self.errors.append(str(e))
+            finally:
+                self.pending.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued snapshot is on disk."""
+        self.pending.join()
+
+    def close(self) -> None:
+        self.pending.put(None)
+        self.writer.join()
+
+
 class StreamProcessor:
-    def __init__(self, streams: List[DataStream]) -> None:
+    def __init__(
+        self,
+        streams: List[DataStream],
+        executors: Optional[Dict[str, str]] = None,
+        max_workers: Optional[int] = None,
+        checkpointer: Optional[StreamCheckpointer] = None,
+    ) -> None:
+        """
+        executors: stream_id -> "thread" | "process". Streams not listed
+        run inline in the caller, as before.
+        checkpointer: streams resume from its saved snapshots here, and
+        execute() offers it a checkpoint after every call.
+        """
         self.streams_by_id = {s.stream_id: s for s in streams}
+        self.executors = dict(executors or {})
+        for stream_id, mode in self.executors.items():
+            if mode not in EXECUTORS:
+                raise ValueError(
+                    f"Unknown executor {mode!r} "
+                    f"(expected one of: {', '.join(EXECUTORS)})"
+                )
+            stream = self.streams_by_id.get(stream_id)
+            if (
+                mode == "process"
+                and isinstance(stream, SensorStream)
+                and stream.event_time is not None
+                and stream.event_time.on_close is not None
+            ):
+                # it would fire inside the worker, on a copy
+                raise ValueError(
+                    f"{stream_id!r} has an on_close callback; "
+                    "run it inline or on a thread"
+                )
+        self.max_workers = max_workers
+        self.pools: Dict[str, Executor] = {}
+        self.timings_ns: Dict[str, int] = {}
+        self.checkpointer = checkpointer
+        if checkpointer is not None:
+            checkpointer.restore(streams)
+
+    def _pool(self, mode: str) -> Executor:
+        pool = self.pools.get(mode)
+        if pool is None:
+            pool = self.pools[mode] = EXECUTORS[mode](self.max_workers)
+        return pool
 
-    def execute(self, batch_map: Dict[str, List[Any]]) -> Dict[str, str]:
+    @staticmethod
+    def _process_copy(stream: DataStream) -> DataStream:
+        """
+        Shallow copy to pickle for a process worker. Its clock is read
+        here, as the batch arrival time, so any callable (a lambda, a
+        bound method) works as a clock in process mode too.
+        """
+        if not isinstance(stream, TransactionStream):
+            return stream
+        payload = copy.copy(stream)
+        payload.clock = _FixedClock(stream.clock())
+        return payload
+
+    def shutdown(self) -> None:
+        for pool in self.pools.values():
+            pool.shutdown()
+        self.pools.clear()
+        if self.checkpointer is not None:
+            self.checkpointer.checkpoint(self.streams_by_id.values())
+            self.checkpointer.flush()
+
+    def __enter__(self) -> "StreamProcessor":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+
+    def execute(self, batch_map: Dict[str, Batch]) -> Dict[str, str]:
         """
         batch_map: { "SENSOR_001", "TRANS_001", "EVENT_001" }
+        Pooled streams are submitted first so they overlap with the inline
+        ones; results keep batch_map order. A pooled stream's timing runs
+        from submit to completion, so it includes queueing and IPC.
         """
-        results: Dict[str, str] = {}
+        pending: Dict[str, Future[Tuple[str, int, Optional[bytes]]]] = {}
+        submitted: Dict[str, int] = {}
+        finished: Dict[str, int] = {}
+        done: Dict[str, str] = {}
 
         for stream_id, batch in batch_map.items():
             stream = self.streams_by_id.get(stream_id)
-            if stream is None:
-                results[stream_id] = (
-                    "Unknown stream_id (no registered stream)."
+            mode = self.executors.get(stream_id)
+            if stream is None or mode is None:
+                continue
+            if mode == "process":
+                stream = self._process_copy(stream)
+            submitted[stream_id] = time.perf_counter_ns()
+            future = pending[stream_id] = self._pool(mode).submit(
+                _timed_batch, stream, batch, send_back=mode == "process"
+            )
+            future.add_done_callback(
+                lambda _, sid=stream_id: finished.__setitem__(
+                    sid, time.perf_counter_ns()
                 )
+            )
+
+        for stream_id, batch in batch_map.items():
+            if stream_id in pending:
                 continue
+            stream = self.streams_by_id.get(stream_id)
+            if stream is None:
+                done[stream_id] = "Unknown stream_id (no registered stream)."
+                continue
+            done[stream_id], self.timings_ns[stream_id], _ = _timed_batch(
+                stream, batch, send_back=False
+            )
+
+        for stream_id, future in pending.items():
+            result, _, state = future.result()
+            # the done callback may still be running when result() returns
+            end = finished.get(stream_id) or time.perf_counter_ns()
+            if state is not None:
+                self.streams_by_id[stream_id].restore(state)
+            done[stream_id] = result
+            self.timings_ns[stream_id] = end - submitted[stream_id]
+
+        if self.checkpointer is not None:
+            self.checkpointer.maybe_checkpoint(self.streams_by_id.values())
+        return {stream_id: done[stream_id] for stream_id in batch_map}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats: Dict[str, Dict[str, Any]] = {}
+        for stream_id, stream in self.streams_by_id.items():
+            row = stream.get_stats()
+            row["executor"] = self.executors.get(stream_id, "inline")
+            if stream_id in self.timings_ns:
+                row["last_execute_ms"] = self.timings_ns[stream_id] / 1e6
+            stats[stream_id] = row
+        return stats
+
+
+def _shard_worker(conn: Any, streams: List[DataStream]) -> None:
+    """
+    Shard process body: owns `streams` and serves ("execute", batch_map),
+    ("stats", None) and ("stop", None) requests arriving on `conn`.
+    """
+    processor = StreamProcessor(streams)
+    while True:
+        op, payload = conn.recv()
+        if op == "stop":
+            break
+        try:
+            if op == "execute":
+                reply: Any = processor.execute(payload)
+            else:
+                reply = processor.get_stats()
+        except Exception as e:  # noqa: BLE001
+            # the exception itself may not pickle; its text always does
+            conn.send((False, RuntimeError(
+                f"Shard worker failed: {e!r}\n{traceback.format_exc()}"
+            )))
+        else:
+            conn.send((True, reply))
+    conn.close()
+
+
+class ShardedStreamProcessor:
+    """
+    StreamProcessor spread over `shards` worker processes. Each stream_id
+    is hash-partitioned to one worker, which owns that DataStream for its
+    whole life: batches travel to it over a pipe, results and stats come
+    back, and the stream itself is never copied again.
+
+    The coordinator keeps no stream state; ask get_stats() instead of
+    reading the stream objects passed in. A failure inside a worker is
+    re-raised here as RuntimeError carrying the worker's traceback text.
+    """
+
+    def __init__(
+        self,
+        streams: List[DataStream],
+        shards: Optional[int] = None,
+        mp_context: Optional[str] = None,
+    ) -> None:
+        # one process per stream at most: empty shards only cost IPC
+        self.shards = shards or max(
+            1, min(len(streams), os.cpu_count() or 1)
+        )
+        self.stream_ids = [s.stream_id for s in streams]
+        self.shard_of = {sid: self.shard_for(sid) for sid in self.stream_ids}
+        owned: List[List[DataStream]] = [[] for _ in range(self.shards)]
+        for stream in streams:
+            owned[self.shard_of[stream.stream_id]].append(stream)
+
+        ctx = multiprocessing.get_context(mp_context)
+        self.conns: List[Any] = []
+        self.workers: List[Any] = []
+        for shard, shard_streams in enumerate(owned):
+            parent, child = ctx.Pipe()
+            worker = ctx.Process(
+                target=_shard_worker, args=(child, shard_streams),
+                name=f"stream-shard-{shard}", daemon=True,
+            )
+            worker.start()
+            child.close()
+            self.conns.append(parent)
+            self.workers.append(worker)
+
+    def shard_for(self, stream_id: str) -> int:
+        # _hash64, not hash(): str hashes are salted per process
+        return _hash64(stream_id) % self.shards
+
+    def _call(
+        self, requests: Dict[int, Tuple[str, Any]]
+    ) -> Dict[int, Any]:
+        """Send every request first so the shards work in parallel."""
+        for shard, request in requests.items():
+            self.conns[shard].send(request)
+        replies: Dict[int, Any] = {}
+        failure: Optional[Exception] = None
+        for shard in requests:
+            ok, reply = self.conns[shard].recv()
+            if ok:
+                replies[shard] = reply
+            elif failure is None:
+                failure = reply
+        if failure is not None:
+            raise failure
+        return replies
+
+    def execute(self, batch_map: Dict[str, Batch]) -> Dict[str, str]:
+        """Same contract as StreamProcessor.execute; order is preserved."""
+        per_shard: Dict[int, Dict[str, Batch]] = {}
+        done: Dict[str, str] = {}
+        for stream_id, batch in batch_map.items():
+            shard = self.shard_of.get(stream_id)
+            if shard is None:
+                done[stream_id] = "Unknown stream_id (no registered stream)."
+            else:
+                per_shard.setdefault(shard, {})[stream_id] = batch
+
+        replies = self._call(
+            {shard: ("execute", sub) for shard, sub in per_shard.items()}
+        )
+        for results in replies.values():
+            done.update(results)
+        return {stream_id: done[stream_id] for stream_id in batch_map}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        replies = self._call(
+            dict.fromkeys(range(self.shards), ("stats", None))
+        )
+        stats: Dict[str, Dict[str, Any]] = {}
+        for stream_id in self.stream_ids:
+            shard = self.shard_of[stream_id]
+            row = replies[shard][stream_id]
+            row["executor"] = f"shard {shard}"
+            stats[stream_id] = row
+        return stats
+
+    def shutdown(self) -> None:
+        for conn, worker in zip(self.conns, self.workers, strict=True):
+            if worker.is_alive():
+                with contextlib.suppress(OSError):
+                    conn.send(("stop", None))
+            worker.join()
+            conn.close()
+        self.conns.clear()
+        self.workers.clear()
+
+    def __enter__(self) -> "ShardedStreamProcessor":
+        return self
 
-            results[stream_id] = stream.process_batch(batch)
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
 
-        return results
+
+class MicroBatchScheduler:
+    """
+    Buffers single items per stream_id in front of a StreamProcessor and
+    flushes a stream's buffer when it reaches max_batch items or when its
+    oldest item has waited max_delay seconds. Larger batches amortize
+    per-batch cost (throughput); a shorter delay bounds latency.
+
+    Deadlines are checked on submit() and poll(); a producer loop that may
+    go quiet should call poll() periodically.
+    """
+
+    def __init__(
+        self,
+        processor: Union[StreamProcessor, ShardedStreamProcessor],
+        max_batch: int = 100,
+        max_delay: float = 0.05,
+        limits: Optional[Dict[str, Tuple[int, float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.processor = processor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.limits = dict(limits or {})
+        self.clock = clock
+        self.buffers: Dict[str, List[Any]] = {}
+        self.oldest: Dict[str, float] = {}
+        self.flushes = {"size": 0, "deadline": 0, "manual": 0}
+
+    def _limits(self, stream_id: str) -> Tuple[int, float]:
+        return self.limits.get(stream_id, (self.max_batch, self.max_delay))
+
+    def submit(self, stream_id: str, item: Any) -> Dict[str, str]:
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            buffer = self.buffers[stream_id] = []
+        if not buffer:
+            self.oldest[stream_id] = self.clock()
+        buffer.append(item)
+
+        if len(buffer) >= self._limits(stream_id)[0]:
+            return self._flush([stream_id], "size")
+        return self.poll()
+
+    def poll(self) -> Dict[str, str]:
+        now = self.clock()
+        due = [
+            stream_id for stream_id, since in self.oldest.items()
+            if now - since >= self._limits(stream_id)[1]
+        ]
+        return self._flush(due, "deadline") if due else {}
+
+    def flush(self, stream_id: Optional[str] = None) -> Dict[str, str]:
+        ids = list(self.oldest) if stream_id is None else [stream_id]
+        return self._flush(ids, "manual")
+
+    def _flush(self, stream_ids: List[str], reason: str) -> Dict[str, str]:
+        batch_map: Dict[str, Batch] = {}
+        for stream_id in stream_ids:
+            if self.buffers.get(stream_id):
+                batch_map[stream_id] = self.buffers[stream_id]
+                self.buffers[stream_id] = []
+                self.oldest.pop(stream_id, None)
+        if not batch_map:
+            return {}
+        self.flushes[reason] += len(batch_map)
+        return self.processor.execute(batch_map)
+
+    def queue_depth(self) -> Dict[str, int]:
+        return {
+            stream_id: len(buffer)
+            for stream_id, buffer in self.buffers.items()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "flushes": dict(self.flushes),
+            "max_batch": self.max_batch,
+            "max_delay": self.max_delay,
+        }
+
+
+class AsyncStreamProcessor:
+    """
+    Asyncio variant of StreamProcessor: every registered stream drains its
+    own bounded asyncio.Queue. submit() awaits a free slot, so producers
+    slow down as soon as a consumer falls maxsize items behind.
+
+    A consumer takes whatever is queued (up to batch_size items) as one
+    process_batch call, so bursts are batched and quiet periods stay
+    low-latency. A batch that raises is recorded (results, get_lag) and
+    the consumer keeps draining, so producers never wait on a dead queue.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        streams: List[DataStream],
+        maxsize: int = 1000,
+        batch_size: int = 100,
+        keep_results: int = 100,
+    ) -> None:
+        self.streams_by_id = {s.stream_id: s for s in streams}
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.queues: Dict[str, asyncio.Queue[Any]] = {}
+        self.consumers: List[asyncio.Task[None]] = []
+        self.consumer_of: Dict[str, asyncio.Task[None]] = {}
+        self.results: Dict[str, Deque[str]] = {
+            stream_id: deque(maxlen=keep_results)
+            for stream_id in self.streams_by_id
+        }
+        self.enqueued = dict.fromkeys(self.streams_by_id, 0)
+        self.consumed = dict.fromkeys(self.streams_by_id, 0)
+        self.last_wait = dict.fromkeys(self.streams_by_id, 0.0)
+        self.producer_waits = dict.fromkeys(self.streams_by_id, 0)
+        self.failed_batches = dict.fromkeys(self.streams_by_id, 0)
+        self.last_error: Dict[str, Optional[str]] = dict.fromkeys(
+            self.streams_by_id
+        )
+
+    async def start(self) -> None:
+        for stream_id, stream in self.streams_by_id.items():
+            pending: asyncio.Queue[Any] = asyncio.Queue(self.maxsize)
+            self.queues[stream_id] = pending
+            task = asyncio.create_task(self._consume(stream, pending))
+            self.consumer_of[stream_id] = task
+            self.consumers.append(task)
+
+    async def stop(self) -> None:
+        """Drain what is queued, then end the consumers."""
+        for stream_id, items in self.queues.items():
+            # a finished consumer would never make room for the sentinel
+            if not self.consumer_of[stream_id].done():
+                await items.put(self._STOP)
+        try:
+            await asyncio.gather(*self.consumers)
+        finally:
+            self.consumers.clear()
+            self.consumer_of.clear()
+            self.queues.clear()
+
+    async def __aenter__(self) -> "AsyncStreamProcessor":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.stop()
+
+    async def submit(self, stream_id: str, item: Any) -> None:
+        if stream_id not in self.streams_by_id:
+            raise KeyError(f"Unknown stream_id {stream_id!r}")
+        self._check_consumer(stream_id)
+        pending = self.queues[stream_id]
+        if pending.full():
+            self.producer_waits[stream_id] += 1
+        await pending.put((item, time.monotonic()))
+        self.enqueued[stream_id] += 1
+
+    def _check_consumer(self, stream_id: str) -> None:
+        task = self.consumer_of.get(stream_id)
+        if task is not None and not task.done():
+            return
+        if (
+            task is not None
+            and not task.cancelled()
+            and task.exception() is not None
+        ):
+            raise RuntimeError(
+                f"Consumer for {stream_id!r} died"
+            ) from task.exception()
+        raise RuntimeError(f"Consumer for {stream_id!r} is not running")
+
+    async def _consume(
+        self, stream: DataStream, pending: asyncio.Queue[Any]
+    ) -> None:
+        stream_id = stream.stream_id
+        while True:
+            entry = await pending.get()
+            entries = [entry]
+            while len(entries) < self.batch_size and not pending.empty():
+                entries.append(pending.get_nowait())
+
+            stop = entries[-1] is self._STOP
+            if stop:
+                entries.pop()
+            if entries:
+                self.last_wait[stream_id] = time.monotonic() - entries[0][1]
+                batch = [item for item, _ in entries]
+                try:
+                    result = stream.process_batch(batch)
+                except Exception as e:  # noqa: BLE001
+                    self.failed_batches[stream_id] += 1
+                    self.last_error[stream_id] = repr(e)
+                    result = f"Batch failed: {e!r}"
+                self.results[stream_id].append(result)
+                self.consumed[stream_id] += len(entries)
+                # let producers blocked on this queue run
+                await asyncio.sleep(0)
+            if stop:
+                return
+
+    def get_lag(self) -> Dict[str, Dict[str, Union[int, float, str, None]]]:
+        """
+        Per stream: queued items, items accepted but not yet processed,
+        how long the oldest item of the last batch waited, how often a
+        producer found the queue full, and batches whose processing raised.
+        """
+        return {
+            stream_id: {
+                "queue_depth": (
+                    self.queues[stream_id].qsize()
+                    if stream_id in self.queues else 0
+                ),
+                "lag_items": (
+                    self.enqueued[stream_id] - self.consumed[stream_id]
+                ),
+                "last_wait_ms": self.last_wait[stream_id] * 1e3,
+                "producer_waits": self.producer_waits[stream_id],
+                "failed_batches": self.failed_batches[stream_id],
+                "last_error": self.last_error[stream_id],
+            }
+            for stream_id in self.streams_by_id
+        }
 
 
 if __name__ == "__main__":
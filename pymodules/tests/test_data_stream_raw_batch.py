@@ -0,0 +1,38 @@
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+DATA_STREAM = Path(__file__).resolve().parents[1] / "mod05/ex1/data_stream.py"
+
+
+def load_data_stream() -> ModuleType:
+    if "data_stream" in sys.modules:
+        return sys.modules["data_stream"]
+    spec = importlib.util.spec_from_file_location("data_stream", DATA_STREAM)
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["data_stream"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+ds = load_data_stream()
+
+
+def test_filter_raw_batch_with_predicate():
+    batch = ds.RawBatch(b"temp:1\nALERT:temp:2\n")
+    stream = ds.SensorStream()
+    assert stream.filter_data(batch, ds.KeyPrefix("ALERT")) == [
+        "ALERT:temp:2"
+    ]
+    assert stream.filter_data(batch, "temp") == ["temp:1", "ALERT:temp:2"]
+
+
+def test_columnar_batch_from_raw_batch():
+    columns = ds.ColumnarBatch.from_items(ds.RawBatch(b"login:42\n"))
+    assert columns.items == ["login:42"]
+    assert ds.EventStream().process_batch(columns) == (
+        "Event analysis: 1 events, 0 errors detected"
+    )
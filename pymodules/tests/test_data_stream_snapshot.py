@@ -0,0 +1,196 @@
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import pytest
+
+DATA_STREAM = Path(__file__).resolve().parents[1] / "mod05/ex1/data_stream.py"
+
+
+def load_data_stream() -> ModuleType:
+    spec = importlib.util.spec_from_file_location("data_stream", DATA_STREAM)
+    assert spec is not None
+    assert spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["data_stream"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+ds = load_data_stream()
+
+
+def make_streams() -> list[Any]:
+    transactions = ds.TransactionStream()
+    transactions.clock = lambda: 42.0
+    transactions.add_window(ds.CountWindow(3))
+    transactions.add_window(ds.TimeWindow(10, slots=5))
+    transactions.add_window(ds.TimeWindow(10, tumbling=True))
+    sensors = ds.SensorStream(
+        event_time=ds.EventTimeWindows(10, allowed_lateness=5)
+    )
+    return [
+        sensors,
+        transactions,
+        ds.EventStream(),
+        ds.EventStream("SKETCH_001", sketch=ds.EventSketch(top_k=3)),
+    ]
+
+
+def feed(streams: list[Any]) -> None:
+    sensors, transactions, events, sketched = streams
+    sensors.process_batch(["temp:21.5@1", "humidity:60@4", "temp:23@17"])
+    sensors.process_batch(["temp:19@26", "pressure:1013@12"])
+    transactions.process_batch(["buy:100", "sell:30", "buy:2", "buy:9"])
+    events.process_batch(["login", "error", "logout"])
+    sketched.process_batch(["login", "error", "a", "b", "error"])
+
+
+def untimed_snapshot(stream: Any) -> bytes:
+    """snapshot() with the wall-clock counters zeroed."""
+    stream.total_time_ns = stream.last_batch_ns = 0
+    for bucket in range(len(stream.latency_histogram)):
+        stream.latency_histogram[bucket] = 0
+    return stream.snapshot()
+
+
+def test_round_trip_restores_state():
+    before, after = make_streams(), make_streams()
+    feed(before)
+    for source, target in zip(before, after, strict=True):
+        target.restore(source.snapshot())
+        assert target.snapshot() == source.snapshot()
+
+    sensors, transactions, _, sketched = after
+    assert sensors.metrics.summaries() == before[0].metrics.summaries()
+    assert list(sensors.event_time.closed) == list(
+        before[0].event_time.closed
+    )
+    assert [w.totals() for w in transactions.windows] == [
+        w.totals() for w in before[1].windows
+    ]
+    assert sketched.sketch.top() == before[3].sketch.top()
+    assert sketched.sketch.distinct() == before[3].sketch.distinct()
+
+
+def test_restore_keeps_caller_objects():
+    source, target = ds.TransactionStream(), ds.TransactionStream()
+    source.add_window(ds.CountWindow(3))
+    window = target.add_window(ds.CountWindow(3))
+    source.process_batch(["buy:100", "sell:50"])
+    target.restore(source.snapshot())
+    assert target.windows[0] is window
+    assert window.totals() == (100.0, 50.0)
+
+
+def test_restored_stream_keeps_processing():
+    source, target = make_streams(), make_streams()
+    feed(source)
+    for stream, restored in zip(source, target, strict=True):
+        restored.restore(stream.snapshot())
+    feed(source)
+    feed(target)
+    for stream, restored in zip(source, target, strict=True):
+        assert untimed_snapshot(restored) == untimed_snapshot(stream)
+
+
+@pytest.mark.parametrize("cut", [1, 4, 9, 40, -1])
+def test_truncated_snapshot_is_rejected(cut: int):
+    data = make_streams()[1].snapshot()
+    with pytest.raises(ValueError, match=r"Truncated|Not a stream snapshot"):
+        make_streams()[1].restore(data[:cut])
+
+
+def test_trailing_data_is_rejected():
+    data = ds.SensorStream().snapshot()
+    with pytest.raises(ValueError, match="trailing"):
+        ds.SensorStream().restore(data + b"\0" * 8)
+
+
+def test_bad_magic_is_rejected():
+    data = ds.SensorStream().snapshot()
+    with pytest.raises(ValueError, match="Not a stream snapshot"):
+        ds.SensorStream().restore(b"XXXX" + data[4:])
+
+
+def test_kind_and_id_must_match():
+    data = ds.SensorStream().snapshot()
+    with pytest.raises(ValueError, match="SensorStream"):
+        ds.EventStream().restore(data)
+    with pytest.raises(ValueError, match="SENSOR_001"):
+        ds.SensorStream("SENSOR_002").restore(data)
+
+
+def test_layout_must_match():
+    with_windows = ds.TransactionStream()
+    with_windows.add_window(ds.CountWindow(3))
+    with pytest.raises(ValueError, match="window count"):
+        ds.TransactionStream().restore(with_windows.snapshot())
+
+    sketched = ds.EventStream(sketch=ds.EventSketch())
+    with pytest.raises(ValueError, match="sketch mode"):
+        ds.EventStream().restore(sketched.snapshot())
+
+    narrow = ds.TransactionStream()
+    narrow.add_window(ds.CountWindow(3))
+    wide = ds.TransactionStream()
+    wide.add_window(ds.CountWindow(4))
+    with pytest.raises(ValueError, match="layout"):
+        wide.restore(narrow.snapshot())
+
+
+def test_rejected_restore_leaves_stream_unchanged():
+    narrow = ds.TransactionStream()
+    narrow.add_window(ds.CountWindow(3))
+    narrow.process_batch(["buy:1", "sell:2"])
+    wide = ds.TransactionStream()
+    wide.add_window(ds.CountWindow(4))
+    wide.process_batch(["buy:100", "sell:50", "buy:7"])
+    before = wide.snapshot()
+    with pytest.raises(ValueError, match="layout"):
+        wide.restore(narrow.snapshot())
+    assert wide.snapshot() == before
+
+    timed = make_streams()[0]
+    timed.process_batch(["temp:21.5@1", "temp:23@17"])
+    plain = ds.SensorStream()
+    plain.process_batch(["temp:21.5", "humidity:60"])
+    before = plain.snapshot()
+    with pytest.raises(ValueError, match="event-time"):
+        plain.restore(timed.snapshot())
+    assert plain.snapshot() == before
+    assert plain.metrics.summaries()
+
+
+def test_checkpointer_restore_is_all_or_nothing(tmp_path: Path):
+    streams = make_streams()
+    feed(streams)
+    checkpointer = ds.StreamCheckpointer(tmp_path, interval=0)
+    checkpointer.checkpoint(streams)
+    checkpointer.flush()
+    checkpointer.close()
+
+    fresh = make_streams()
+    fresh[3] = ds.EventStream("SKETCH_001")  # no sketch: layout differs
+    before = [stream.snapshot() for stream in fresh]
+    with pytest.raises(ValueError, match="sketch mode"):
+        ds.StreamCheckpointer(tmp_path).restore(fresh)
+    assert [stream.snapshot() for stream in fresh] == before
+
+
+def test_checkpointer_round_trip(tmp_path: Path):
+    streams = make_streams()
+    feed(streams)
+    checkpointer = ds.StreamCheckpointer(tmp_path, interval=0)
+    checkpointer.checkpoint(streams)
+    checkpointer.flush()
+    checkpointer.close()
+    assert checkpointer.errors == []
+
+    fresh = make_streams()
+    restored = ds.StreamCheckpointer(tmp_path).restore(fresh)
+    assert restored == [s.stream_id for s in streams]
+    for stream, copy in zip(streams, fresh, strict=True):
+        assert copy.snapshot() == stream.snapshot()